@@ -37,6 +37,10 @@ from typing import Any
 JLCPCB_API_URL = "https://jlcpcb.com/api/overseas-pcb-order/v1/shoppingCart/smtGood/selectSmtComponentList"
 DEFAULT_TIMEOUT = 30
 
+# The server is long-running, so keep one HTTP session (and its pooled
+# connections) alive across tool calls
+http_session = requests.Session()
+
 
 def search_jlcpcb(query: str, limit: int = 10) -> list[dict]:
     """
@@ -63,7 +67,7 @@ def search_jlcpcb(query: str, limit: int = 10) -> list[dict]:
     }
 
     try:
-        response = requests.post(
+        response = http_session.post(
             JLCPCB_API_URL,
             json=payload,
             headers=headers,
@@ -199,9 +203,12 @@ def get_part_by_name(part_name: str) -> dict:
     return {"warning": f"Exact match not found for '{part_name}', showing best match", "part": results[0]}
 
 
+PART_TYPE_ORDER = {"Basic": 0, "Preferred": 1, "Extended": 2}
+
+
 def get_type_sort_key(part_type: str) -> int:
     """Sort key for part types: Basic=0, Preferred=1, Extended=2."""
-    return {"Basic": 0, "Preferred": 1, "Extended": 2}.get(part_type, 3)
+    return PART_TYPE_ORDER.get(part_type, 3)
 
 
 def propose_best_part(variants: list[dict]) -> dict | None:
@@ -222,8 +229,7 @@ def propose_best_part(variants: list[dict]) -> dict | None:
         price_key = v.get("price_usd") or 999999
         return (in_stock_key, type_key, stock_key, price_key)
 
-    sorted_variants = sorted(variants, key=sort_key)
-    return sorted_variants[0] if sorted_variants else None
+    return min(variants, key=sort_key)
 
 
 def search_family_variants(family: str, module: str = "", quantity: int = 1) -> dict:
@@ -335,7 +341,7 @@ def check_symbol_available(lcsc_code: str) -> dict:
     # Check EasyEDA API for component UUID
     try:
         url = EASYEDA_API_URL.format(lcsc_code)
-        response = requests.get(url, timeout=DEFAULT_TIMEOUT)
+        response = http_session.get(url, timeout=DEFAULT_TIMEOUT)
 
         if response.status_code == 200:
             data = response.json()
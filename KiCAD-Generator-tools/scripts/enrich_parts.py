@@ -20,14 +20,17 @@ Usage:
 """
 
 import argparse
-import json
 import logging
-import time
+import threading
 import yaml
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from jlc_http import DEFAULT_CACHE_MAX_AGE_HOURS, QueryCache, RateLimiter, size_http_pool
+from yaml_loader import YamlDumper, YamlLoader
 
 # Logging setup
 logging.basicConfig(
@@ -43,26 +46,97 @@ JLCPCB_API_URL = "https://jlcpcb.com/api/overseas-pcb-order/v1/shoppingCart/smtG
 # Request timeout
 DEFAULT_TIMEOUT = 30
 
-# Rate limiting (be polite to API)
+# Rate limiting (be polite to API): minimum seconds between requests
 REQUEST_DELAY = 0.3
 
+# Parts enriched concurrently (the work is network-bound)
+DEFAULT_WORKERS = 4
+
+# One HTTP session for all lookups so the TLS connection to the API is
+# reused; the pool is sized for the worker threads sharing it
+API_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "User-Agent": "Mozilla/5.0"
+}
+http_session = requests.Session()
+http_session.headers.update(API_HEADERS)
+size_http_pool(http_session, DEFAULT_WORKERS)
+
+# Persistent query cache (stored next to the output file)
+CACHE_FILENAME = ".jlcpcb_cache.sqlite"
+
+rate_limiter = RateLimiter(REQUEST_DELAY)
+
+# Active cache, set up by enrich_parts() (None = caching disabled)
+query_cache: Optional[QueryCache] = None
+
+# Searches issued during this run, keyed by (query, limit). Parts that share
+# a query (e.g. several 0603 10k resistors) wait on the same request.
+_searches: Dict[Tuple[str, int], Future] = {}
+_searches_lock = threading.Lock()
+
 
 def load_yaml(path: Path) -> dict:
     """Load YAML file."""
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=YamlLoader)
 
 
 def save_yaml(path: Path, data: dict) -> None:
     """Save data to YAML file."""
     with open(path, "w", encoding="utf-8") as f:
-        yaml.dump(data, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+        yaml.dump(data, f, Dumper=YamlDumper, default_flow_style=False, allow_unicode=True, sort_keys=False)
 
 
 def search_jlcpcb(query: str, limit: int = 5) -> List[dict]:
     """
     Search official JLCPCB BOM API for parts.
 
+    Identical queries within a run are issued only once; concurrent
+    callers wait for the request already in flight. Each caller gets its
+    own copy of the component dicts. See fetch_jlcpcb() for the fields.
+    """
+    key = (query, limit)
+    with _searches_lock:
+        future = _searches.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _searches[key] = future
+
+    if owner:
+        try:
+            future.set_result(cached_search_jlcpcb(query, limit))
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+
+    return [dict(c) for c in future.result()]
+
+
+def cached_search_jlcpcb(query: str, limit: int = 5) -> List[dict]:
+    """Search via the persistent query cache when one is active."""
+    if query_cache is not None:
+        cached = query_cache.get(query, limit)
+        if cached is not None:
+            logger.debug(f"Cache hit for '{query}'")
+            return cached
+
+    components = fetch_jlcpcb(query, limit)
+    if components is None:
+        return []
+
+    if query_cache is not None:
+        query_cache.put(query, limit, components)
+    return components
+
+
+def fetch_jlcpcb(query: str, limit: int = 5) -> Optional[List[dict]]:
+    """
+    Search official JLCPCB BOM API for parts.
+    Returns None if the request failed (so failures are never cached).
+
     Returns list of components with:
     - lcsc: LCSC part code (e.g., "C12345")
     - mfr: Manufacturer part number
@@ -81,20 +155,15 @@ def search_jlcpcb(query: str, limit: int = 5) -> List[dict]:
         "componentLibraryType": "",
         "stockSort": ""
     }
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "User-Agent": "Mozilla/5.0"
-    }
-
+    rate_limiter.wait()
     try:
-        response = requests.post(JLCPCB_API_URL, json=payload, headers=headers, timeout=DEFAULT_TIMEOUT)
+        response = http_session.post(JLCPCB_API_URL, json=payload, timeout=DEFAULT_TIMEOUT)
         response.raise_for_status()
         data = response.json()
 
         if data.get("code") != 200:
             logger.warning(f"API returned code {data.get('code')}: {data.get('message')}")
-            return []
+            return None
 
         # Extract component list from nested response
         page_info = data.get("data", {}).get("componentPageInfo", {})
@@ -139,10 +208,10 @@ def search_jlcpcb(query: str, limit: int = 5) -> List[dict]:
 
     except requests.exceptions.RequestException as e:
         logger.error(f"API request failed for '{query}': {e}")
-        return []
+        return None
     except Exception as e:
         logger.error(f"Error processing response for '{query}': {e}")
-        return []
+        return None
 
 
 def get_part_type(component: dict) -> str:
@@ -198,11 +267,29 @@ def find_best_in_stock(candidates: List[dict]) -> Optional[dict]:
     return max(in_stock, key=score)
 
 
-def enrich_part(part: dict) -> dict:
+def known_placeholder(part: dict, known_lcsc: str) -> dict:
+    """Candidate built from the known LCSC code alone, without an API lookup."""
+    return {
+        "lcsc": known_lcsc,
+        "mfr": part.get("part_number", ""),
+        "package": part.get("package", ""),
+        "stock": None,
+        "price": None,
+        "is_basic": False,
+        "is_preferred": False,
+        "description": part.get("function", ""),
+        "datasheet": "",
+    }
+
+
+def enrich_part(part: dict, confirm_known: bool = False) -> dict:
     """
     Enrich a single part with JLCPCB data.
 
-    Search strategy:
+    Parts with a known LCSC code are taken as-is without any API call
+    (stock, price and type left unknown) unless confirm_known is True.
+
+    Search strategy otherwise:
     1. Search by known LCSC code (if provided)
     2. Search by exact part number
     3. If stock=0, search by BASE part name to find alternatives
@@ -222,7 +309,32 @@ def enrich_part(part: dict) -> dict:
         "alternatives_searched": False
     }
 
+    if known_lcsc and known_lcsc != "NOT_FOUND" and not confirm_known:
+        logger.info(f"  [{part_id}] Using known LCSC {known_lcsc} without lookup")
+        selected = known_placeholder(part, known_lcsc)
+        enriched["jlcpcb_lookup"].update({
+            "searched": False,
+            "found": True,
+            "all_candidates": [selected],
+            "selected": selected,
+            "unconfirmed": True
+        })
+        enriched["jlcpcb_price"] = None
+        enriched["jlcpcb_stock"] = None
+        enriched["jlcpcb_type"] = "Unknown"
+        enriched["jlcpcb_available"] = None
+        enriched["jlcpcb_package"] = selected["package"]
+        enriched["jlcpcb_datasheet"] = None
+        return enriched
+
     all_candidates = []
+    seen_lcsc = set()  # LCSC codes already in all_candidates
+
+    def add_new(results: List[dict]) -> None:
+        for r in results:
+            if r.get("lcsc") not in seen_lcsc:
+                seen_lcsc.add(r.get("lcsc"))
+                all_candidates.append(r)
 
     # Step 1: Search by LCSC code first (most reliable)
     if known_lcsc:
@@ -230,7 +342,7 @@ def enrich_part(part: dict) -> dict:
         results = search_jlcpcb(known_lcsc, limit=5)
         enriched["jlcpcb_lookup"]["search_queries"].append({"query": known_lcsc, "type": "lcsc"})
         all_candidates.extend(results)
-        time.sleep(REQUEST_DELAY)
+        seen_lcsc.update(r.get("lcsc") for r in results)
 
     # Step 2: Search by exact part number
     if part_number:
@@ -238,11 +350,7 @@ def enrich_part(part: dict) -> dict:
         results = search_jlcpcb(part_number, limit=10)
         enriched["jlcpcb_lookup"]["search_queries"].append({"query": part_number, "type": "part_number"})
         # Add results not already in candidates
-        existing_lcsc = {c.get("lcsc") for c in all_candidates}
-        for r in results:
-            if r.get("lcsc") not in existing_lcsc:
-                all_candidates.append(r)
-        time.sleep(REQUEST_DELAY)
+        add_new(results)
 
     # Step 3: If no in-stock candidates, search by BASE part name
     in_stock_count = sum(1 for c in all_candidates if c.get("stock", 0) > 0)
@@ -254,11 +362,7 @@ def enrich_part(part: dict) -> dict:
             enriched["jlcpcb_lookup"]["search_queries"].append({"query": base_name, "type": "base_name"})
             enriched["jlcpcb_lookup"]["alternatives_searched"] = True
             # Add results not already in candidates
-            existing_lcsc = {c.get("lcsc") for c in all_candidates}
-            for r in results:
-                if r.get("lcsc") not in existing_lcsc:
-                    all_candidates.append(r)
-            time.sleep(REQUEST_DELAY)
+            add_new(results)
 
     # Store all candidates
     enriched["jlcpcb_lookup"]["all_candidates"] = all_candidates
@@ -307,10 +411,37 @@ def enrich_part(part: dict) -> dict:
     return enriched
 
 
-def enrich_parts(input_path: Path, output_path: Path) -> dict:
+def enrich_parts(input_path: Path, output_path: Path, workers: int = DEFAULT_WORKERS,
+                 use_cache: bool = True,
+                 cache_max_age_hours: float = DEFAULT_CACHE_MAX_AGE_HOURS,
+                 confirm_known: bool = False) -> dict:
     """
     Enrich all parts from input YAML with JLCPCB data.
+
+    Parts are looked up concurrently on a bounded thread pool; results
+    are collected in input order so the output file is stable. Search
+    results are cached on disk next to the output file unless use_cache
+    is False. Parts with a known LCSC code make no API calls unless
+    confirm_known is True.
     """
+    global query_cache
+    _searches.clear()
+    size_http_pool(http_session, workers)
+    if use_cache:
+        query_cache = QueryCache(output_path.parent / CACHE_FILENAME, cache_max_age_hours)
+        logger.info(f"Using query cache: {query_cache.path}")
+
+    try:
+        return _enrich_parts(input_path, output_path, workers, confirm_known)
+    finally:
+        if query_cache is not None:
+            query_cache.close()
+            query_cache = None
+
+
+def _enrich_parts(input_path: Path, output_path: Path, workers: int,
+                  confirm_known: bool) -> dict:
+    """Body of enrich_parts(), run with the query cache set up."""
     logger.info(f"Loading parts from: {input_path}")
     data = load_yaml(input_path)
 
@@ -327,18 +458,27 @@ def enrich_parts(input_path: Path, output_path: Path) -> dict:
         "preferred": 0,
         "extended": 0,
         "out_of_stock": 0,
+        "unconfirmed": 0,
         "lcsc_mismatches": []
     }
 
-    for idx, part in enumerate(parts, 1):
+    def process(idx: int, part: dict) -> dict:
         part_id = part.get("id", f"part_{idx}")
         logger.info(f"[{idx}/{total}] Processing: {part_id}")
+        return enrich_part(part, confirm_known)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(process, range(1, total + 1), parts))
 
-        enriched = enrich_part(part)
+    for idx, (part, enriched) in enumerate(zip(parts, results), 1):
+        part_id = part.get("id", f"part_{idx}")
         enriched_parts.append(enriched)
 
         # Update stats
-        if enriched.get("jlcpcb_lookup", {}).get("found"):
+        if enriched.get("jlcpcb_lookup", {}).get("unconfirmed"):
+            stats["found"] += 1
+            stats["unconfirmed"] += 1
+        elif enriched.get("jlcpcb_lookup", {}).get("found"):
             stats["found"] += 1
             part_type = enriched.get("jlcpcb_type", "").lower()
             if part_type == "basic":
@@ -361,8 +501,6 @@ def enrich_parts(input_path: Path, output_path: Path) -> dict:
                 **mismatch
             })
 
-        time.sleep(REQUEST_DELAY)
-
     # Build output
     output = {
         "meta": {
@@ -390,6 +528,7 @@ def enrich_parts(input_path: Path, output_path: Path) -> dict:
     print(f"Preferred:       {stats['preferred']}")
     print(f"Extended:        {stats['extended']}")
     print(f"Out of stock:    {stats['out_of_stock']}")
+    print(f"Unconfirmed:     {stats['unconfirmed']}")
 
     if stats["lcsc_mismatches"]:
         print(f"\nLCSC Mismatches ({len(stats['lcsc_mismatches'])}):")
@@ -405,6 +544,14 @@ def main():
     parser = argparse.ArgumentParser(description="Enrich parts with JLCPCB data")
     parser.add_argument("--input", "-i", required=True, help="Input YAML file (step1_parts_candidates.yaml)")
     parser.add_argument("--output", "-o", required=True, help="Output YAML file (step2_parts_enriched.yaml)")
+    parser.add_argument("--workers", "-j", type=int, default=DEFAULT_WORKERS,
+                        help=f"Parts to look up concurrently (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always query the API, ignoring the on-disk result cache")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_CACHE_MAX_AGE_HOURS,
+                        help=f"Refetch cached results older than this many hours (default: {DEFAULT_CACHE_MAX_AGE_HOURS:g})")
+    parser.add_argument("--confirm-known", action="store_true",
+                        help="Look up parts with a known LCSC code for current stock and price")
     args = parser.parse_args()
 
     input_path = Path(args.input)
@@ -417,7 +564,9 @@ def main():
     # Create output directory if needed
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    enrich_parts(input_path, output_path)
+    enrich_parts(input_path, output_path, workers=args.workers,
+                 use_cache=not args.no_cache, cache_max_age_hours=args.max_age,
+                 confirm_known=args.confirm_known)
     return 0
 
 
@@ -22,6 +22,7 @@ Usage:
 """
 
 import json
+import os
 import subprocess
 import tempfile
 import re
@@ -29,18 +30,37 @@ import shutil
 from pathlib import Path
 from typing import Set, Dict, List
 
+from file_cache import load_cached
+
 # Try to import yaml, fall back to basic parsing if not available
 try:
     import yaml
+    from yaml_loader import YamlLoader
     HAS_YAML = True
 except ImportError:
     HAS_YAML = False
 
+# Try to import orjson for faster JSON loading, fall back to json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 
 # Generic parts that use standard symbols (don't need individual LCSC symbols)
 # Set to empty to download ALL symbols including passives
 GENERIC_PREFIXES = set()  # Previously: {'R', 'C', 'L'}
 
+# Sidecar caches: library LCSC codes (next to the library) and the
+# aggregated LCSC codes of a parts file (next to the parts file)
+SYMBOL_INDEX_CACHE = '.symbol_index.pkl'
+PARTS_AGG_CACHE = '.parts_agg.pkl'
+
+# Precompiled patterns
+YAML_LCSC_RE = re.compile(r'lcsc:\s*["\']?(C\d+)["\']?')
+VALUE_PROPERTY_RE = re.compile(r'(\(property "Value"[^)]+\)\s*\))')
+
 
 def extract_lcsc_from_yaml(yaml_path: Path) -> Dict[str, str]:
     """
@@ -52,23 +72,19 @@ def extract_lcsc_from_yaml(yaml_path: Path) -> Dict[str, str]:
 
     if HAS_YAML:
         with open(yaml_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-        for part in data.get('parts', []):
-            lcsc = part.get('lcsc', '')
-            value = part.get('part', '') or part.get('value', '')
-            prefix = part.get('prefix', '')
-
-            # Skip generic passives - they use standard R/C/L symbols
-            if prefix in GENERIC_PREFIXES:
-                continue
-
-            if lcsc and lcsc.startswith('C'):
-                lcsc_parts[lcsc] = value
+            data = yaml.load(f, Loader=YamlLoader)
+        # Skip generic passives - they use standard R/C/L symbols
+        lcsc_parts = {
+            part['lcsc']: part.get('part', '') or part.get('value', '')
+            for part in data.get('parts', [])
+            if (part.get('lcsc') or '')[:1] == 'C'
+            and part.get('prefix', '') not in GENERIC_PREFIXES
+        }
     else:
         # Basic regex parsing if PyYAML not installed
         content = yaml_path.read_text(encoding='utf-8')
         # Find lcsc: "Cxxxxx" patterns (can't filter by prefix without full parsing)
-        for match in re.finditer(r'lcsc:\s*["\']?(C\d+)["\']?', content):
+        for match in YAML_LCSC_RE.finditer(content):
             lcsc = match.group(1)
             lcsc_parts[lcsc] = lcsc  # Use LCSC as value if can't parse
 
@@ -81,52 +97,69 @@ def extract_lcsc_from_json(json_path: Path) -> Dict[str, str]:
     Returns dict of {lcsc_code: part_value} for tracking.
     Skips generic passives (R, C, L) that use standard symbols.
     """
-    with open(json_path, 'r', encoding='utf-8') as f:
-        model = json.load(f)
-
-    lcsc_parts = {}
-    for part in model.get('parts', []):
-        lcsc = part.get('lcsc', '')
-        value = part.get('value', '')
-        ref = part.get('ref', '')
-
-        # Skip generic passives - check if ref starts with R, C, or L
-        if ref and ref[0] in GENERIC_PREFIXES:
-            continue
-
-        if lcsc and lcsc.startswith('C'):
-            lcsc_parts[lcsc] = value
+    if HAS_ORJSON:
+        model = orjson.loads(json_path.read_bytes())
+    else:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            model = json.load(f)
 
-    return lcsc_parts
+    # Skip generic passives (ref starts with R, C, or L) and parts without
+    # a real LCSC code; later parts win for duplicate codes
+    return {
+        part['lcsc']: part.get('value', '')
+        for part in model.get('parts', [])
+        if (part.get('lcsc') or '')[:1] == 'C'
+        and (part.get('ref') or '')[:1] not in GENERIC_PREFIXES
+    }
 
 
 def extract_lcsc_codes(parts_path: Path) -> Dict[str, str]:
     """
     Extract LCSC codes from either JSON or YAML file.
     Returns dict of {lcsc_code: part_value} for tracking.
+    Cached next to the parts file, keyed by its mtime and size.
     """
     if parts_path.suffix in ['.yaml', '.yml']:
-        return extract_lcsc_from_yaml(parts_path)
+        loader = extract_lcsc_from_yaml
     else:
-        return extract_lcsc_from_json(parts_path)
+        loader = extract_lcsc_from_json
+    return load_cached(parts_path, parts_path.parent / PARTS_AGG_CACHE, loader)
 
 
 def get_existing_symbols(library_path: Path) -> Set[str]:
     """
     Get set of LCSC codes that already have symbols in the library.
     Looks for property "LCSC" "Cxxxxx" in the .kicad_sym file.
-    """
-    existing = set()
 
+    Single linear pass over the raw bytes using the literal token KiCad
+    writes - no decode and no regex over a multi-MB library. The result
+    is cached in a sidecar pickle keyed by the library's mtime and size,
+    so an unchanged library is not rescanned on the next run.
+    """
     if not library_path.exists():
-        return existing
+        return set()
+
+    return load_cached(library_path, library_path.parent / SYMBOL_INDEX_CACHE,
+                       scan_existing_symbols)
 
-    content = library_path.read_text(encoding='utf-8')
+
+def scan_existing_symbols(library_path: Path) -> Set[str]:
+    """Scan the library for LCSC codes without caching."""
+    existing = set()
+    content = library_path.read_bytes()
+    token = b'(property "LCSC" "'
 
     # Find all LCSC properties: (property "LCSC" "C12345" ...)
-    pattern = r'\(property\s+"LCSC"\s+"(C\d+)"'
-    matches = re.findall(pattern, content)
-    existing.update(matches)
+    pos = content.find(token)
+    while pos != -1:
+        start = pos + len(token)
+        end = content.find(b'"', start)
+        if end == -1:
+            break
+        code = content[start:end]
+        if code[:1] == b'C' and code[1:].isdigit():
+            existing.add(code.decode('ascii'))
+        pos = content.find(token, end)
 
     return existing
 
@@ -201,8 +234,7 @@ def extract_symbol_from_file(sym_file: Path, lcsc_code: str) -> str | None:
         # Ensure LCSC property exists
         if f'"LCSC"' not in symbol_text:
             # Add LCSC property after Value property
-            symbol_text = re.sub(
-                r'(\(property "Value"[^)]+\)\s*\))',
+            symbol_text = VALUE_PROPERTY_RE.sub(
                 f'\\1\n    (property "LCSC" "{lcsc_code}" (at 0 0 0) (effects (font (size 1.27 1.27)) hide))',
                 symbol_text
             )
@@ -211,6 +243,20 @@ def extract_symbol_from_file(sym_file: Path, lcsc_code: str) -> str | None:
     return None
 
 
+def write_library_atomic(library_path: Path, content: str):
+    """
+    Replace the library file without ever leaving it half-written.
+    The new content is written and fsync'd to a temp file next to the
+    library, then moved over it with os.replace.
+    """
+    tmp_path = library_path.with_name(library_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, library_path)
+
+
 def append_symbol_to_library(library_path: Path, symbol_text: str):
     """
     Append a symbol definition to the JLCPCB.kicad_sym library.
@@ -219,11 +265,10 @@ def append_symbol_to_library(library_path: Path, symbol_text: str):
 
     # Find the closing paren of the library
     # Insert the new symbol before the final )
-    if content.rstrip().endswith(')'):
-        # Remove final ) and add new symbol + )
-        content = content.rstrip()[:-1]
-        content += f"\n\n  {symbol_text}\n\n)"
-        library_path.write_text(content, encoding='utf-8')
+    content = content.rstrip()
+    if content.endswith(')'):
+        # Remove final ) and add new symbol + ) - one copy of the library text
+        write_library_atomic(library_path, f"{content[:-1]}\n\n  {symbol_text}\n\n)")
         return True
 
     return False
@@ -237,6 +282,10 @@ def ensure_symbols(pin_model_path: Path, library_path: Path, dry_run: bool = Fal
     - "exists" - already in library
     - "added" - successfully downloaded and added
     - "failed" - could not download
+    - "missing" - not attempted (dry run, or interrupted with Ctrl-C)
+
+    Each symbol is appended to the library as soon as it is downloaded, so
+    interrupting a long run keeps everything added so far.
     """
     print(f"Reading: {pin_model_path}")
     lcsc_parts = extract_lcsc_codes(pin_model_path)
@@ -246,13 +295,15 @@ def ensure_symbols(pin_model_path: Path, library_path: Path, dry_run: bool = Fal
     existing = get_existing_symbols(library_path)
     print(f"  Library has {len(existing)} symbols with LCSC codes")
 
-    # Find missing symbols
-    missing = set(lcsc_parts.keys()) - existing
-
-    if not missing:
+    # Common case: everything is already there - a subset test stops at the
+    # first missing code and allocates nothing
+    if lcsc_parts.keys() <= existing:
         print("\n  All symbols present!")
         return {code: "exists" for code in lcsc_parts}
 
+    # Find missing symbols
+    missing = lcsc_parts.keys() - existing
+
     print(f"\n  Missing {len(missing)} symbols:")
     for code in sorted(missing):
         print(f"    - {code}: {lcsc_parts[code]}")
@@ -264,35 +315,19 @@ def ensure_symbols(pin_model_path: Path, library_path: Path, dry_run: bool = Fal
     # Download missing symbols
     results = {code: "exists" for code in existing}
 
+    pending = sorted(missing)
+    for code in pending:
+        results[code] = "missing"
+
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_path = Path(temp_dir)
 
-        for code in sorted(missing):
-            print(f"\n  Downloading {code} ({lcsc_parts[code]})...")
-
-            # Clear temp dir for each download
-            for item in temp_path.iterdir():
-                if item.is_dir():
-                    shutil.rmtree(item)
-                else:
-                    item.unlink()
-
-            sym_file = download_symbol(code, temp_path)
-
-            if sym_file:
-                symbol_text = extract_symbol_from_file(sym_file, code)
-                if symbol_text:
-                    if append_symbol_to_library(library_path, symbol_text):
-                        print(f"    Added to library")
-                        results[code] = "added"
-                    else:
-                        print(f"    Failed to append to library")
-                        results[code] = "failed"
-                else:
-                    print(f"    Could not extract symbol")
-                    results[code] = "failed"
-            else:
-                results[code] = "failed"
+        try:
+            for code in pending:
+                download_and_append(code, lcsc_parts[code], temp_path, library_path, results)
+        except KeyboardInterrupt:
+            remaining = sum(1 for s in results.values() if s == "missing")
+            print(f"\n  Interrupted - {remaining} symbols not attempted, re-run to continue")
 
     # Summary
     added = sum(1 for s in results.values() if s == "added")
@@ -302,6 +337,39 @@ def ensure_symbols(pin_model_path: Path, library_path: Path, dry_run: bool = Fal
     return results
 
 
+def download_and_append(code: str, value: str, temp_path: Path, library_path: Path,
+                        results: Dict[str, str]):
+    """
+    Download one symbol and append it to the library.
+    Records the outcome in results[code] ("added" or "failed").
+    """
+    print(f"\n  Downloading {code} ({value})...")
+
+    # Clear temp dir for each download
+    for item in temp_path.iterdir():
+        if item.is_dir():
+            shutil.rmtree(item)
+        else:
+            item.unlink()
+
+    sym_file = download_symbol(code, temp_path)
+
+    if sym_file:
+        symbol_text = extract_symbol_from_file(sym_file, code)
+        if symbol_text:
+            if append_symbol_to_library(library_path, symbol_text):
+                print(f"    Added to library")
+                results[code] = "added"
+            else:
+                print(f"    Failed to append to library")
+                results[code] = "failed"
+        else:
+            print(f"    Could not extract symbol")
+            results[code] = "failed"
+    else:
+        results[code] = "failed"
+
+
 def main():
     import argparse
 
@@ -361,7 +429,7 @@ def main():
         if args.create_library:
             # Create empty library
             library.parent.mkdir(parents=True, exist_ok=True)
-            library.write_text('(kicad_symbol_lib (version 20220914) (generator ensure_symbols)\n\n)\n')
+            write_library_atomic(library, '(kicad_symbol_lib (version 20220914) (generator ensure_symbols)\n\n)\n')
             print(f"Created empty library: {library}")
         else:
             print(f"Error: Library not found at {library}")
@@ -370,9 +438,11 @@ def main():
 
     results = ensure_symbols(parts_file, library, dry_run=args.dry_run)
 
-    # Exit with error if any failed
+    # Exit with error if any failed (or were skipped by an interrupted run)
     if any(s == "failed" for s in results.values()):
         return 1
+    if not args.dry_run and any(s == "missing" for s in results.values()):
+        return 1
     return 0
 
 
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Sidecar pickle cache for parsed input files, shared by the pipeline scripts.
+
+Re-running a step on unchanged inputs then skips YAML/JSON/library parsing.
+"""
+
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable
+
+
+def load_cached(path: Path, cache_path: Path, loader: Callable[[Path], Any],
+                version: int = 0) -> Any:
+    """
+    Return loader(path), cached in a sidecar pickle at cache_path.
+
+    The cache is keyed by version and the file's resolved path, mtime and
+    size, so editing the file invalidates it; bump version when the shape
+    of the loaded data changes. Any cache that cannot be read back is
+    treated as a miss. The result must be plain picklable data.
+    """
+    st = path.stat()
+    key = (version, str(path.resolve()), st.st_mtime_ns, st.st_size)
+
+    try:
+        cached = pickle.loads(cache_path.read_bytes())
+        if cached.get('key') == key:
+            return cached['data']
+    except Exception:
+        pass  # Missing, corrupt or incompatible cache - rebuild it
+
+    data = loader(path)
+
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    try:
+        tmp_path.write_bytes(pickle.dumps({'key': key, 'data': data},
+                                          protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Read-only location - just skip caching
+
+    return data
@@ -10,53 +10,26 @@ Creates a complete KiCAD project with:
 
 Parts are placed in a grid layout with net labels on each pin.
 Symbol references use JLCPCB:LCSC_CODE format for later library linking.
+Symbols found in the JLCPCB library are embedded in lib_symbols so KiCAD
+does not have to resolve them from the external library on open.
 """
 
-import json
 import uuid
 from pathlib import Path
 from datetime import datetime
 
-# LCSC part number to symbol name mapping
-# Maps LCSC codes to our custom symbol library names
-LCSC_TO_SYMBOL = {
-    # ICs
-    "C2913206": "ESP32-S3-MINI-1-N8",
-    "C195417": "SI4735-D60-GU",
-    "C7971": "TDA1306T",
-    "C16581": "TP4056",
-    "C6186": "AMS1117-3.3",
-    "C7519": "USBLC6-2SC6",
-    # Connectors
-    "C393939": "TYPE-C-31-M-12",
-    "C131337": "S2B-PH-K-S",
-    "C145819": "PJ-327A",
-    "C124378": "Header-1x04",
-    "C238128": "TestPoint",
-    # UI components
-    "C470747": "EC11E18244A5",
-    "C127509": "TS-1102S",
-    "C2761795": "WS2812B-B",
-    # Passive components
-    "C32346": "Crystal-32.768kHz",
-    # Resistors - all map to generic "R" symbol
-    "C23186": "R",   # 5.1k
-    "C22975": "R",   # 2k
-    "C25804": "R",   # 10k
-    "C25900": "R",   # 4.7k
-    "C22775": "R",   # 100R
-    # Capacitors - all map to generic "C" symbol
-    "C45783": "C",   # 22uF
-    "C134760": "C",  # 220uF
-    "C15850": "C",   # 10uF
-    "C15849": "C",   # 1uF
-    "C14663": "C",   # 100nF
-    "C1653": "C",    # 22pF
-}
+from kicad9_schematic import load_json, parse_kicad_sym, embed_symbol_lines, write_if_changed
+from lcsc_symbols import LCSC_TO_SYMBOL
+
+
+# UUIDs are derived from what they identify (name-based, version 5), so a
+# regenerated schematic only differs where the design itself changed
+UUID_NAMESPACE = uuid.UUID('6b1c4a2e-5d3f-4e8a-9c07-2f1e8d4b6a53')
 
 
-def generate_uuid():
-    return str(uuid.uuid4())
+def generate_uuid(key: str) -> str:
+    """Return a stable (version 5) UUID string for key."""
+    return str(uuid.uuid5(UUID_NAMESPACE, key))
 
 
 def generate_project_file(project_name: str) -> str:
@@ -130,80 +103,135 @@ def generate_fp_lib_table() -> str:
 )'''
 
 
+SYMBOL_CATEGORIES = {
+    'U': 'ic',
+    'R': 'resistor',
+    'C': 'capacitor',
+    'D': 'led',
+    'J': 'connector',
+    'SW': 'switch',
+    'ENC': 'encoder',
+    'Y': 'crystal',
+    'TP': 'testpoint',
+}
+
+
 def get_symbol_category(ref: str) -> str:
     """Determine symbol category from reference designator."""
-    prefix = ''.join(c for c in ref if c.isalpha())
-    categories = {
-        'U': 'ic',
-        'R': 'resistor',
-        'C': 'capacitor',
-        'D': 'led',
-        'J': 'connector',
-        'SW': 'switch',
-        'ENC': 'encoder',
-        'Y': 'crystal',
-        'TP': 'testpoint',
-    }
-    return categories.get(prefix, 'generic')
+    # Designators are always {prefix}{number}, so stripping the trailing
+    # digits yields the prefix without a per-character scan
+    prefix = ref.rstrip('0123456789')
+    return SYMBOL_CATEGORIES.get(prefix, 'generic')
 
 
-def generate_symbol_instance(designator: str, lib_id: str, footprint: str,
-                            value: str, lcsc: str, x: float, y: float,
-                            project_name: str) -> str:
-    """Generate a KiCAD symbol instance."""
-    sym_uuid = generate_uuid()
+# Output templates, filled with str.format and pre-formatted coordinates
+SCHEMATIC_HEADER_TEMPLATE = '''(kicad_sch (version 20231120) (generator "python_generator")
+  (uuid "{uuid}")
+  (paper "A2")
+  (title_block
+    (title "ESP32-S3 Portable Radio Receiver")
+    (date "{date}")
+    (rev "1.0")
+    (comment 1 "Generated from pin_model.json via LLM pipeline")
+  )
+  (lib_symbols{lib_symbols})
+
+'''
 
-    return f'''  (symbol (lib_id "{lib_id}") (at {x:.2f} {y:.2f} 0)
-    (uuid "{sym_uuid}")
-    (property "Reference" "{designator}" (at {x:.2f} {y - 5:.2f} 0)
+SCHEMATIC_FOOTER = '''
+  (sheet_instances (path "/" (page "1")))
+)
+'''
+
+SYMBOL_INSTANCE_TEMPLATE = '''  (symbol (lib_id "{lib_id}") (at {x} {y} 0)
+    (uuid "{uuid}")
+    (property "Reference" "{designator}" (at {x} {y_ref} 0)
       (effects (font (size 1.27 1.27))))
-    (property "Value" "{value}" (at {x:.2f} {y + 5:.2f} 0)
+    (property "Value" "{value}" (at {x} {y_value} 0)
       (effects (font (size 1.27 1.27))))
-    (property "Footprint" "{footprint}" (at {x:.2f} {y + 7:.2f} 0)
+    (property "Footprint" "{footprint}" (at {x} {y_footprint} 0)
       (effects (font (size 1.27 1.27)) hide))
-    (property "LCSC" "{lcsc}" (at {x:.2f} {y + 9:.2f} 0)
+    (property "LCSC" "{lcsc}" (at {x} {y_lcsc} 0)
       (effects (font (size 1.27 1.27)) hide))
     (instances (project "{project_name}" (path "/" (reference "{designator}") (unit 1))))
   )
 '''
 
-
-def generate_net_label(net_name: str, x: float, y: float, rotation: int = 0) -> str:
-    """Generate a net label."""
-    justify = "left" if rotation == 0 else "right"
-    return f'''  (label "{net_name}" (at {x:.2f} {y:.2f} {rotation}) (fields_autoplaced yes)
+NET_LABEL_TEMPLATE = '''  (label "{net_name}" (at {x} {y} {rotation}) (fields_autoplaced yes)
     (effects (font (size 1.27 1.27)) (justify {justify}))
-    (uuid "{generate_uuid()}"))
+    (uuid "{uuid}"))
 '''
 
 
+def format_coord(value: float) -> str:
+    """Format a coordinate to 2 decimals."""
+    return f"{value:.2f}"
+
+
+def generate_symbol_instance(designator: str, lib_id: str, footprint: str,
+                            value: str, lcsc: str, x: float, y: float,
+                            project_name: str) -> str:
+    """Generate a KiCAD symbol instance."""
+    return SYMBOL_INSTANCE_TEMPLATE.format(
+        lib_id=lib_id,
+        uuid=generate_uuid(f"symbol:{designator}"),
+        designator=designator,
+        value=value,
+        footprint=footprint,
+        lcsc=lcsc,
+        project_name=project_name,
+        x=format_coord(x),
+        y=format_coord(y),
+        y_ref=format_coord(y - 5),
+        y_value=format_coord(y + 5),
+        y_footprint=format_coord(y + 7),
+        y_lcsc=format_coord(y + 9),
+    )
+
+
+def generate_net_label(net_name: str, x: float, y: float, rotation: int = 0,
+                       uuid_key: str = None) -> str:
+    """Generate a net label. uuid_key names the pin it belongs to; without
+    one the UUID is derived from the net name and position."""
+    if uuid_key is None:
+        uuid_key = f"{net_name}@{format_coord(x)},{format_coord(y)}"
+    return NET_LABEL_TEMPLATE.format(
+        net_name=net_name,
+        x=format_coord(x),
+        y=format_coord(y),
+        rotation=rotation,
+        justify="left" if rotation == 0 else "right",
+        uuid=generate_uuid(f"label:{uuid_key}"),
+    )
+
+
+# Placement order by designator prefix - ICs first, then connectors, then passives
+PREFIX_ORDER = {'U': 0, 'J': 1, 'SW': 2, 'ENC': 3, 'D': 4, 'Y': 5, 'TP': 6, 'R': 7, 'C': 8}
+
+
 def sort_parts_key(part: dict):
     """Sort key for parts - ICs first, then connectors, then passives."""
     ref = part.get('ref', 'X?')
-    prefix = ''.join(c for c in ref if c.isalpha())
-    num = ''.join(c for c in ref if c.isdigit())
-    order = {'U': 0, 'J': 1, 'SW': 2, 'ENC': 3, 'D': 4, 'Y': 5, 'TP': 6, 'R': 7, 'C': 8}
-    return (order.get(prefix, 99), int(num) if num else 0)
-
+    # Usual {prefix}{number} designator: split at the trailing digits
+    prefix = ref.rstrip('0123456789')
+    num = ref[len(prefix):]
+    if prefix and not prefix.isalpha():
+        # Unusual designator (e.g. "U1A") - letters and digits anywhere
+        prefix = ''.join(c for c in ref if c.isalpha())
+        num = ''.join(c for c in ref if c.isdigit())
+    return (PREFIX_ORDER.get(prefix, 99), int(num) if num else 0)
 
-def generate_schematic(model: dict, project_name: str) -> str:
-    """Generate KiCAD schematic from pin model."""
 
-    parts = model.get('parts', [])
+def generate_schematic(model: dict, project_name: str, symbols: dict = None) -> str:
+    """
+    Generate KiCAD schematic from pin model.
 
-    # Header
-    content = f'''(kicad_sch (version 20231120) (generator "python_generator")
-  (uuid "{generate_uuid()}")
-  (paper "A2")
-  (title_block
-    (title "ESP32-S3 Portable Radio Receiver")
-    (date "{datetime.now().strftime('%Y-%m-%d')}")
-    (rev "1.0")
-    (comment 1 "Generated from pin_model.json via LLM pipeline")
-  )
-  (lib_symbols)
+    symbols maps symbol names to parsed library definitions (see
+    parse_kicad_sym); each one used by a part is embedded in lib_symbols.
+    """
 
-'''
+    parts = model.get('parts', [])
+    symbols = symbols or {}
 
     # Layout configuration
     start_x = 50
@@ -218,8 +246,10 @@ def generate_schematic(model: dict, project_name: str) -> str:
     # Sort parts by category
     sorted_parts = sorted(parts, key=sort_parts_key)
 
-    symbols_content = ""
-    labels_content = ""
+    lib_symbols_content = []
+    embedded = set()
+    symbols_content = []
+    labels_content = []
 
     for part in sorted_parts:
         ref = part.get('ref', 'X?')
@@ -228,31 +258,31 @@ def generate_schematic(model: dict, project_name: str) -> str:
         footprint = part.get('footprint', '')
         pins = part.get('pins', {})
 
-        # Build lib_id using LCSC to symbol mapping
+        # Build lib_id using LCSC to symbol mapping (one dict lookup)
         # This ensures lib_ids match our custom symbol library
-        if lcsc and lcsc in LCSC_TO_SYMBOL:
-            lib_id = f"JLCPCB:{LCSC_TO_SYMBOL[lcsc]}"
-        elif lcsc:
-            lib_id = f"JLCPCB:{lcsc}"
-        else:
-            lib_id = f"JLCPCB:{ref}"
+        symbol_name = LCSC_TO_SYMBOL.get(lcsc, lcsc) if lcsc else ref
+        lib_id = f"JLCPCB:{symbol_name}"
+
+        # Embed each library symbol once, the first time it is used
+        if symbol_name not in embedded and symbol_name in symbols:
+            embedded.add(symbol_name)
+            lib_symbols_content.extend(embed_symbol_lines(symbols[symbol_name], lib_id, "    "))
 
         # Calculate position
         x = start_x + col * x_spacing
         y = start_y + row * y_spacing
 
         # Generate symbol
-        symbols_content += generate_symbol_instance(
+        symbols_content.append(generate_symbol_instance(
             ref, lib_id, footprint, value, lcsc, x, y, project_name
-        )
+        ))
 
         # Generate net labels for each pin
-        pin_offset_y = 0
-        for pin_name, net_name in pins.items():
-            label_x = x + 30  # Labels to the right of symbol
-            label_y = y + pin_offset_y
-            labels_content += generate_net_label(net_name, label_x, label_y, 0)
-            pin_offset_y += 2.54  # Standard KiCAD pin spacing
+        label_x = x + 30  # Labels to the right of symbol
+        for pin_idx, (pin_name, net_name) in enumerate(pins.items()):
+            label_y = y + pin_idx * 2.54  # Standard KiCAD pin spacing
+            labels_content.append(generate_net_label(net_name, label_x, label_y, 0,
+                                                     uuid_key=f"{ref}.{pin_name}"))
 
         # Move to next grid position
         col += 1
@@ -260,16 +290,18 @@ def generate_schematic(model: dict, project_name: str) -> str:
             col = 0
             row += 1
 
-    content += symbols_content
-    content += labels_content
+    # Header (output is collected as a list of chunks and joined once)
+    if lib_symbols_content:
+        lib_symbols = "\n" + "\n".join(lib_symbols_content) + "\n  "
+    else:
+        lib_symbols = ""
+    header = SCHEMATIC_HEADER_TEMPLATE.format(
+        uuid=generate_uuid(f"schematic:{project_name}"),
+        date=datetime.now().strftime('%Y-%m-%d'),
+        lib_symbols=lib_symbols,
+    )
 
-    # Footer
-    content += '''
-  (sheet_instances (path "/" (page "1")))
-)
-'''
-
-    return content
+    return "".join([header, *symbols_content, *labels_content, SCHEMATIC_FOOTER])
 
 
 def main():
@@ -277,6 +309,8 @@ def main():
     model_file = script_dir / "work" / "pin_model.json"
     output_dir = script_dir / "output"
 
+    symbol_lib = script_dir / "libs" / "JLCPCB" / "symbol" / "JLCPCB.kicad_sym"
+
     project_name = "RadioReceiver"
 
     print(f"KiCAD Project Generator")
@@ -284,14 +318,22 @@ def main():
 
     # Load pin model
     print(f"\nLoading: {model_file}")
-    with open(model_file, 'r', encoding='utf-8') as f:
-        model = json.load(f)
+    model = load_json(model_file)
 
     stats = model.get('statistics', {})
     print(f"  Parts: {stats.get('total_parts', 0)}")
     print(f"  Nets: {stats.get('total_nets', 0)}")
     print(f"  Pin assignments: {stats.get('total_pin_assignments', 0)}")
 
+    # Load symbol definitions to embed in the schematic
+    symbols = {}
+    if symbol_lib.exists():
+        print(f"\nLoading symbols: {symbol_lib}")
+        symbols = parse_kicad_sym(symbol_lib)
+        print(f"  Symbols: {len(symbols)}")
+    else:
+        print(f"\nSymbol library not found, lib_symbols left empty: {symbol_lib}")
+
     # Ensure output directory exists
     output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -300,28 +342,28 @@ def main():
 
     # Project file
     pro_file = output_dir / f"{project_name}.kicad_pro"
-    pro_file.write_text(generate_project_file(project_name), encoding='utf-8')
-    print(f"  {pro_file.name}")
+    changed = write_if_changed(pro_file, generate_project_file(project_name))
+    print(f"  {pro_file.name}" + ("" if changed else " (unchanged)"))
 
     # Schematic file
     sch_file = output_dir / f"{project_name}.kicad_sch"
-    sch_content = generate_schematic(model, project_name)
-    sch_file.write_text(sch_content, encoding='utf-8')
-    print(f"  {sch_file.name}")
+    sch_content = generate_schematic(model, project_name, symbols)
+    changed = write_if_changed(sch_file, sch_content)
+    print(f"  {sch_file.name}" + ("" if changed else " (unchanged)"))
 
     # PCB file
     pcb_file = output_dir / f"{project_name}.kicad_pcb"
-    pcb_file.write_text(generate_pcb_file(project_name), encoding='utf-8')
-    print(f"  {pcb_file.name}")
+    changed = write_if_changed(pcb_file, generate_pcb_file(project_name))
+    print(f"  {pcb_file.name}" + ("" if changed else " (unchanged)"))
 
     # Library tables
     sym_table = output_dir / "sym-lib-table"
-    sym_table.write_text(generate_sym_lib_table(), encoding='utf-8')
-    print(f"  {sym_table.name}")
+    changed = write_if_changed(sym_table, generate_sym_lib_table())
+    print(f"  {sym_table.name}" + ("" if changed else " (unchanged)"))
 
     fp_table = output_dir / "fp-lib-table"
-    fp_table.write_text(generate_fp_lib_table(), encoding='utf-8')
-    print(f"  {fp_table.name}")
+    changed = write_if_changed(fp_table, generate_fp_lib_table())
+    print(f"  {fp_table.name}" + ("" if changed else " (unchanged)"))
 
     print(f"\n" + "=" * 60)
     print("SUCCESS!")
@@ -16,11 +16,33 @@ import yaml
 from pathlib import Path
 from collections import defaultdict
 
+from file_cache import load_cached
+from kicad9_schematic import write_if_changed
+from yaml_loader import YamlLoader
+
+# Try to import orjson for faster JSON writing, fall back to json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 
 def load_yaml(filepath: Path) -> dict:
-    """Load YAML file."""
+    """
+    Load YAML file.
+
+    The parsed data is cached in a hidden sidecar pickle (.<name>.pkl)
+    keyed by the file's mtime and size, so re-running the step on
+    unchanged inputs skips YAML parsing.
+    """
+    return load_cached(filepath, filepath.parent / f".{filepath.name}.pkl", parse_yaml)
+
+
+def parse_yaml(filepath: Path) -> dict:
+    """Parse a YAML file without caching."""
     with open(filepath, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=YamlLoader)
 
 
 def invert_nets_to_pins(nets: dict) -> dict:
@@ -34,10 +56,9 @@ def invert_nets_to_pins(nets: dict) -> dict:
 
     for net_name, connections in nets.items():
         for conn in connections:
-            if '.' not in conn:
-                continue
-            part_id, pin_name = conn.split('.', 1)
-            part_pins[part_id][pin_name] = net_name
+            part_id, sep, pin_name = conn.partition('.')
+            if sep:
+                part_pins[part_id][pin_name] = net_name
 
     return dict(part_pins)
 
@@ -78,17 +99,20 @@ def generate_pin_model(parts_file: Path, connections_file: Path) -> dict:
 
     # Build output parts list
     output_parts = []
+    total_pin_assignments = 0
 
     for part in parts:
         part_id = part.get('id')
         prefix = part.get('prefix', 'X')
 
-        # Assign ref designator
-        prefix_counters[prefix] += 1
-        ref = generate_ref(prefix, prefix_counters[prefix])
+        # Assign ref designator (one counter read + one write per part)
+        index = prefix_counters[prefix] + 1
+        prefix_counters[prefix] = index
+        ref = generate_ref(prefix, index)
 
         # Get pin mappings for this part
         pins = part_pins.get(part_id, {})
+        total_pin_assignments += len(pins)
 
         # Build output part entry
         output_part = {
@@ -126,7 +150,7 @@ def generate_pin_model(parts_file: Path, connections_file: Path) -> dict:
         "statistics": {
             "total_parts": len(output_parts),
             "total_nets": len(all_nets),
-            "total_pin_assignments": sum(len(p["pins"]) for p in output_parts)
+            "total_pin_assignments": total_pin_assignments
         }
     }
 
@@ -144,11 +168,18 @@ def main():
 
     model = generate_pin_model(parts_file, connections_file)
 
-    # Write JSON output
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(model, f, indent=2)
-
-    print(f"\nGenerated: {output_file}")
+    # Write JSON output, leaving an identical file untouched so the
+    # downstream steps that read pin_model.json see no spurious change.
+    # Both encoders write raw UTF-8 so the bytes match either way.
+    if HAS_ORJSON:
+        text = orjson.dumps(model, option=orjson.OPT_INDENT_2).decode('utf-8')
+    else:
+        text = json.dumps(model, indent=2, ensure_ascii=False)
+
+    if write_if_changed(output_file, text):
+        print(f"\nGenerated: {output_file}")
+    else:
+        print(f"\nUnchanged: {output_file}")
     print(f"  Parts: {model['statistics']['total_parts']}")
     print(f"  Nets: {model['statistics']['total_nets']}")
     print(f"  Pin assignments: {model['statistics']['total_pin_assignments']}")
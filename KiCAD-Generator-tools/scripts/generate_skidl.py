@@ -19,6 +19,9 @@ import argparse
 from pathlib import Path
 from datetime import datetime
 
+# Net name characters that are not valid in Python identifiers
+NET_VAR_TABLE = str.maketrans({'+': 'P', '-': 'N', '.': '_'})
+
 
 def generate_skidl_code(model: dict) -> str:
     """Generate SKiDL Python code from pin model."""
@@ -55,19 +58,20 @@ def generate_skidl_code(model: dict) -> str:
     lines.append('    reset()')
     lines.append('    ')
 
+    # Sanitize net names for Python variables (sorted once, reused below)
+    net_vars = {net_name: net_name.translate(NET_VAR_TABLE)
+                for net_name in sorted(nets)}
+
     # Create nets
     lines.append('    # === Create Nets ===')
-    for net_name in sorted(nets):
-        # Sanitize net name for Python variable
-        var_name = net_name.replace('+', 'P').replace('-', 'N').replace('.', '_')
+    for net_name, var_name in net_vars.items():
         lines.append(f'    net_{var_name} = Net("{net_name}")')
     lines.append('    ')
 
     # Create a lookup for net variables
     lines.append('    # Net lookup')
     lines.append('    nets = {')
-    for net_name in sorted(nets):
-        var_name = net_name.replace('+', 'P').replace('-', 'N').replace('.', '_')
+    for net_name, var_name in net_vars.items():
         lines.append(f'        "{net_name}": net_{var_name},')
     lines.append('    }')
     lines.append('    ')
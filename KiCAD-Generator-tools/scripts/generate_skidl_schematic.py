@@ -17,10 +17,38 @@ os.environ['KICAD_SYMBOL_DIR'] = ''
 
 from skidl import *
 
+from lcsc_symbols import LCSC_TO_SYMBOL
+
 # Use KiCad 5 for schematic generation (it's the only one with full support)
 set_default_tool(KICAD5)
 
 
+def connect_nets(skidl_parts: dict) -> dict:
+    """
+    Connect part pins to nets by name.
+
+    skidl_parts maps ref -> (Part, {pin_name: net_name}).
+    Returns the created nets keyed by name.
+    """
+    nets = {}
+    for ref, (part, pin_mappings) in skidl_parts.items():
+        for pin_name, net_name in pin_mappings.items():
+            if not net_name:
+                continue
+
+            # Get or create net
+            if net_name not in nets:
+                nets[net_name] = Net(net_name)
+
+            # Connect pin to net
+            try:
+                pin = part[pin_name]
+                nets[net_name] += pin
+            except Exception as e:
+                print(f"Warning: Could not connect {ref}.{pin_name} to {net_name}: {e}")
+    return nets
+
+
 def load_pin_model(pin_model_path: Path) -> dict:
     """Load the pin model JSON file."""
     with open(pin_model_path, 'r', encoding='utf-8') as f:
@@ -39,36 +67,6 @@ def create_circuit_from_pin_model(model: dict, symbol_lib_path: Path) -> Circuit
 
     parts_data = model.get('parts', [])
 
-    # LCSC to symbol name mapping
-    lcsc_to_symbol = {
-        "C2913206": "ESP32-S3-MINI-1-N8",
-        "C195417": "SI4735-D60-GU",
-        "C7971": "TDA1306T",
-        "C16581": "TP4056",
-        "C6186": "AMS1117-3.3",
-        "C7519": "USBLC6-2SC6",
-        "C393939": "TYPE-C-31-M-12",
-        "C131337": "S2B-PH-K-S",
-        "C145819": "PJ-327A",
-        "C124378": "Header-1x04",
-        "C238128": "TestPoint",
-        "C470747": "EC11E18244A5",
-        "C127509": "TS-1102S",
-        "C2761795": "WS2812B-B",
-        "C32346": "Crystal-32.768kHz",
-        "C23186": "R",
-        "C22975": "R",
-        "C25804": "R",
-        "C25900": "R",
-        "C22775": "R",
-        "C45783": "C",
-        "C134760": "C",
-        "C15850": "C",
-        "C15849": "C",
-        "C14663": "C",
-        "C1653": "C",
-    }
-
     # Create parts
     skidl_parts = {}
     for part_data in parts_data:
@@ -79,7 +77,7 @@ def create_circuit_from_pin_model(model: dict, symbol_lib_path: Path) -> Circuit
         pins = part_data.get('pins', {})
 
         # Get symbol name
-        sym_name = lcsc_to_symbol.get(lcsc, value)
+        sym_name = LCSC_TO_SYMBOL.get(lcsc, value)
 
         try:
             # Create the part from the library
@@ -92,22 +90,7 @@ def create_circuit_from_pin_model(model: dict, symbol_lib_path: Path) -> Circuit
             print(f"Warning: Could not create part {ref} ({sym_name}): {e}")
 
     # Create nets and connect parts
-    nets = {}
-    for ref, (part, pin_mappings) in skidl_parts.items():
-        for pin_name, net_name in pin_mappings.items():
-            if not net_name:
-                continue
-
-            # Get or create net
-            if net_name not in nets:
-                nets[net_name] = Net(net_name)
-
-            # Connect pin to net
-            try:
-                pin = part[pin_name]
-                nets[net_name] += pin
-            except Exception as e:
-                print(f"Warning: Could not connect {ref}.{pin_name} to {net_name}: {e}")
+    nets = connect_nets(skidl_parts)
 
     print(f"\nCreated {len(skidl_parts)} parts and {len(nets)} nets")
     return ckt
@@ -134,36 +117,6 @@ def main():
     # Load parts and create connections
     parts_data = model.get('parts', [])
 
-    # LCSC to symbol name mapping
-    lcsc_to_symbol = {
-        "C2913206": "ESP32-S3-MINI-1-N8",
-        "C195417": "SI4735-D60-GU",
-        "C7971": "TDA1306T",
-        "C16581": "TP4056",
-        "C6186": "AMS1117-3.3",
-        "C7519": "USBLC6-2SC6",
-        "C393939": "TYPE-C-31-M-12",
-        "C131337": "S2B-PH-K-S",
-        "C145819": "PJ-327A",
-        "C124378": "Header-1x04",
-        "C238128": "TestPoint",
-        "C470747": "EC11E18244A5",
-        "C127509": "TS-1102S",
-        "C2761795": "WS2812B-B",
-        "C32346": "Crystal-32.768kHz",
-        "C23186": "R",
-        "C22975": "R",
-        "C25804": "R",
-        "C25900": "R",
-        "C22775": "R",
-        "C45783": "C",
-        "C134760": "C",
-        "C15850": "C",
-        "C15849": "C",
-        "C14663": "C",
-        "C1653": "C",
-    }
-
     # Load the library
     lib_path = str(symbol_lib_path)
     print(f"Loading symbol library: {lib_path}")
@@ -178,7 +131,7 @@ def main():
         pins = part_data.get('pins', {})
 
         # Get symbol name
-        sym_name = lcsc_to_symbol.get(lcsc, value)
+        sym_name = LCSC_TO_SYMBOL.get(lcsc, value)
 
         try:
             # Create the part from the library
@@ -189,22 +142,7 @@ def main():
             print(f"Warning: Could not create part {ref} ({sym_name}): {e}")
 
     # Create nets and connect parts
-    nets = {}
-    for ref, (part, pin_mappings) in skidl_parts.items():
-        for pin_name, net_name in pin_mappings.items():
-            if not net_name:
-                continue
-
-            # Get or create net
-            if net_name not in nets:
-                nets[net_name] = Net(net_name)
-
-            # Connect pin to net
-            try:
-                pin = part[pin_name]
-                nets[net_name] += pin
-            except Exception as e:
-                print(f"Warning: Could not connect {ref}.{pin_name} to {net_name}: {e}")
+    nets = connect_nets(skidl_parts)
 
     print(f"\nCreated {len(skidl_parts)} parts and {len(nets)} nets")
 
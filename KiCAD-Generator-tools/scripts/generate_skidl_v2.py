@@ -14,43 +14,10 @@ import json
 from pathlib import Path
 from datetime import datetime
 
+from lcsc_symbols import LCSC_TO_SYMBOL
 
-# LCSC part number to symbol name mapping
-# Maps LCSC codes to our custom symbol library names
-LCSC_TO_SYMBOL = {
-    # ICs
-    "C2913206": "ESP32-S3-MINI-1-N8",
-    "C195417": "SI4735-D60-GU",
-    "C7971": "TDA1306T",
-    "C16581": "TP4056",
-    "C6186": "AMS1117-3.3",
-    "C7519": "USBLC6-2SC6",
-    # Connectors
-    "C393939": "TYPE-C-31-M-12",
-    "C131337": "S2B-PH-K-S",
-    "C145819": "PJ-327A",
-    "C124378": "Header-1x04",
-    "C238128": "TestPoint",
-    # UI components
-    "C470747": "EC11E18244A5",
-    "C127509": "TS-1102S",
-    "C2761795": "WS2812B-B",
-    # Passive components
-    "C32346": "Crystal-32.768kHz",
-    # Resistors - all map to generic "R" symbol
-    "C23186": "R",   # 5.1k
-    "C22975": "R",   # 2k
-    "C25804": "R",   # 10k
-    "C25900": "R",   # 4.7k
-    "C22775": "R",   # 100R
-    # Capacitors - all map to generic "C" symbol
-    "C45783": "C",   # 22uF
-    "C134760": "C",  # 220uF
-    "C15850": "C",   # 10uF
-    "C15849": "C",   # 1uF
-    "C14663": "C",   # 100nF
-    "C1653": "C",    # 22pF
-}
+# Net name characters that are not valid in Python identifiers
+NET_VAR_TABLE = str.maketrans({'+': 'P', '-': 'N', '.': '_'})
 
 
 def generate_skidl_code(model: dict) -> str:
@@ -125,9 +92,9 @@ def generate_skidl_code(model: dict) -> str:
     lines.append('    # ========== NETS ==========')
     lines.append('    # All nets are defined here. This is the single source of truth.')
     lines.append('    ')
-    net_vars = {}
+    net_vars = {}  # Filled in sorted order, reused for the return dict below
     for net_name in sorted(nets):
-        var_name = 'net_' + net_name.replace('+', 'P').replace('-', 'N').replace('.', '_')
+        var_name = 'net_' + net_name.translate(NET_VAR_TABLE)
         net_vars[net_name] = var_name
         lines.append(f'    {var_name} = Net("{net_name}")')
     lines.append('    ')
@@ -198,8 +165,7 @@ def generate_skidl_code(model: dict) -> str:
         if part.get('pins'):
             lines.append(f'        "{ref}": {part_id},')
     lines.append('    }, {')
-    for net_name in sorted(nets):
-        var_name = net_vars[net_name]
+    for net_name, var_name in net_vars.items():
         lines.append(f'        "{net_name}": {var_name},')
     lines.append('    }')
     lines.append('')
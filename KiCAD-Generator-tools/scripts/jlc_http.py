@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+HTTP pooling, request pacing and search caching for the JLCPCB part enrichers.
+
+Used by scripts/enrich_parts.py (official JLCPCB API) and
+jlcpcb_parts_pipeline/enrich_parts.py (jlcsearch mirror).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+import requests
+
+# Try to import orjson for faster cache (de)serialisation, fall back to json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Cached search results older than this are refetched
+DEFAULT_CACHE_MAX_AGE_HOURS = 24.0
+
+
+def size_http_pool(session: requests.Session, workers: int) -> None:
+    """Mount an HTTPS adapter on session with one pooled connection per worker."""
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1,
+                                                            pool_maxsize=max(1, workers)))
+
+
+class RateLimiter:
+    """
+    Spaces API requests at least `interval` seconds apart.
+
+    Each caller reserves the next free slot and sleeps only until it
+    arrives, so time already spent waiting on the network counts towards
+    the delay. Safe to share between worker threads.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class QueryCache:
+    """
+    On-disk cache of search results keyed by (query, limit).
+
+    Re-running enrichment on an unchanged parts list then needs no API
+    calls at all. Entries older than max_age_hours are refetched.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, path, max_age_hours: float = DEFAULT_CACHE_MAX_AGE_HOURS):
+        self.path = path
+        self.max_age = max_age_hours * 3600
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search "
+            "(query TEXT, lim INTEGER, fetched_at REAL, result TEXT, PRIMARY KEY (query, lim))"
+        )
+        self._conn.commit()
+
+    def get(self, query: str, limit: int) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, result FROM search WHERE query = ? AND lim = ?",
+                (query, limit)
+            ).fetchone()
+        if row is None or time.time() - row[0] > self.max_age:
+            return None
+        if HAS_ORJSON:
+            return orjson.loads(row[1])
+        return json.loads(row[1])
+
+    def put(self, query: str, limit: int, result: Any) -> None:
+        # orjson produces bytes (stored as a BLOB); both loaders read either form
+        data = orjson.dumps(result) if HAS_ORJSON else json.dumps(result)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search VALUES (?, ?, ?, ?)",
+                (query, limit, time.time(), data)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -16,13 +16,24 @@ This is a standalone module that can be integrated into SKiDL.
 
 import json
 import math
+import os
+import random
 import re
 import uuid
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 from typing import Dict, List, Tuple, Optional, Set
 from datetime import datetime
 
+from file_cache import load_cached
+
+# Try to import orjson for faster JSON loading, fall back to json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 
 # =============================================================================
 # S-Expression Writer
@@ -35,32 +46,36 @@ class SexpWriter:
         self.lines = []
         self.indent_level = 0
         self.indent_char = "\t"
+        self._prefix = ""  # Indent string, rebuilt only when the level changes
 
     def _indent(self) -> str:
-        return self.indent_char * self.indent_level
+        return self._prefix
+
+    def _set_level(self, level: int):
+        self.indent_level = level
+        self._prefix = self.indent_char * level
 
     def line(self, text: str):
         """Add a line with current indentation."""
-        self.lines.append(f"{self._indent()}{text}")
+        self.lines.append(self._prefix + text)
 
     def open(self, name: str, *args, newline: bool = True):
         """Open an S-expression block: (name args..."""
-        parts = [name] + [self._format_arg(a) for a in args]
+        text = " ".join((name, *map(self._format_arg, args)))
         if newline:
-            self.line("(" + " ".join(parts))
-            self.indent_level += 1
+            self.line("(" + text)
+            self._set_level(self.indent_level + 1)
         else:
-            return "(" + " ".join(parts) + ")"
+            return "(" + text + ")"
 
     def close(self):
         """Close an S-expression block."""
-        self.indent_level -= 1
+        self._set_level(self.indent_level - 1)
         self.line(")")
 
     def atom(self, name: str, *args):
         """Write a single-line S-expression: (name args...)"""
-        parts = [name] + [self._format_arg(a) for a in args]
-        self.line("(" + " ".join(parts) + ")")
+        self.line("(" + " ".join((name, *map(self._format_arg, args))) + ")")
 
     # Keywords that should not be quoted
     KEYWORDS = {'yes', 'no', 'default', 'none', 'left', 'right', 'top', 'bottom',
@@ -68,10 +83,13 @@ class SexpWriter:
                 'power_in', 'power_out', 'open_collector', 'open_emitter',
                 'unconnected', 'unspecified', 'line', 'inverted', 'clock'}
 
+    # Bare numbers are written unquoted (compiled once, checked per argument)
+    NUMBER_RE = re.compile(r'^-?\d+\.?\d*$')
+
     def _format_arg(self, arg) -> str:
         """Format an argument for S-expression."""
         if isinstance(arg, str):
-            if arg.startswith('"') or arg in self.KEYWORDS or re.match(r'^-?\d+\.?\d*$', arg):
+            if arg.startswith('"') or arg in self.KEYWORDS or self.NUMBER_RE.match(arg):
                 return arg
             return f'"{arg}"'
         elif isinstance(arg, bool):
@@ -87,9 +105,47 @@ class SexpWriter:
         return "\n".join(self.lines)
 
 
+def load_json(path: Path):
+    """Load a JSON file, using orjson when it is installed."""
+    if HAS_ORJSON:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """
+    Write content to path unless the file already holds exactly that text.
+    Writes go to a temp file in the same directory and are moved into place
+    with os.replace, so an interrupted run never leaves a truncated file.
+    Content is encoded once and compared/written as bytes, bypassing the
+    text layer. Returns True if the file was written.
+    """
+    data = content.encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+# KiCad only needs UUIDs to be unique within a schematic. Drawing them from
+# a seeded generator skips a urandom read per element and makes regenerated
+# schematics diff cleanly; generate_schematic() reseeds it on every run.
+UUID_SEED = 0x4B1CAD
+_uuid_rng = random.Random(UUID_SEED)
+
+
 def generate_uuid() -> str:
     """Generate a UUID for KiCad elements."""
-    return str(uuid.uuid4())
+    return str(uuid.UUID(int=_uuid_rng.getrandbits(128), version=4))
+
+
+# KiCad 6 style attributes that get moved when embedding library symbols
+IN_BOM_RE = re.compile(r'\s*\(in_bom\s+(\w+)\)')
+ON_BOARD_RE = re.compile(r'\s*\(on_board\s+(\w+)\)')
 
 
 # =============================================================================
@@ -132,7 +188,7 @@ class Point:
         return hash((round(self.x, 2), round(self.y, 2)))
 
 
-@dataclass
+@dataclass(slots=True)  # One per library pin; slots keep them small
 class SymbolPin:
     """Pin from symbol definition."""
     name: str
@@ -174,6 +230,7 @@ class PartInstance:
     pins: Dict[str, str] = field(default_factory=dict)  # pin_name -> net_name
     lcsc: str = ""
     footprint: str = ""
+    in_decoupling_area: bool = False  # Tagged once during decoupling cap detection
 
 
 @dataclass
@@ -199,7 +256,54 @@ class Wire:
 # Symbol Library Parser
 # =============================================================================
 
-def parse_kicad_sym(lib_path: Path) -> Dict[str, SymbolDef]:
+# Patterns are compiled once here rather than per symbol inside the parser
+# Top-level symbols (handle both tab and space indentation)
+# Note: Some symbols have extra spaces before (in_bom, so we use \s+ instead of single space
+SYMBOL_START_RE = re.compile(r'\n(\s+)\(symbol "([^"]+)"\s+\(in_bom')
+# Sub-units (symbols ending in _<number>_<number>)
+SUBUNIT_RE = re.compile(r'_\d+_\d+$')
+PIN_RE = re.compile(
+    r'\(pin\s+(\w+)\s+\w+\s*\(at\s+([-\d.]+)\s+([-\d.]+)\s+(\d+)\)\s*\(length\s+([-\d.]+)\).*?\(name\s+"([^"]*)".*?\(number\s+"([^"]*)"',
+    re.DOTALL
+)
+PROPERTY_RE = re.compile(r'\(property "(\w+)" "([^"]*)"')
+PAREN_RE = re.compile(r'[()]')
+RECT_RE = re.compile(r'\(rectangle\s+\(start\s+([-\d.]+)\s+([-\d.]+)\)\s*\(end\s+([-\d.]+)\s+([-\d.]+)\)')
+
+
+# Parsed-library cache, stored next to the library and keyed by its
+# path, mtime and size. Bump the version when SymbolDef/SymbolPin change.
+SYMBOL_CACHE_NAME = '.symbol_defs.pkl'
+SYMBOL_CACHE_VERSION = 1
+
+
+def parse_kicad_sym(lib_path: Path, use_cache: bool = True) -> Dict[str, SymbolDef]:
+    """
+    Parse a .kicad_sym file and extract symbol definitions.
+
+    The result is cached in a sidecar pickle so an unchanged library is
+    not re-parsed on every schematic regeneration. The cache stores plain
+    field dicts (not dataclass instances) so it works whether this module
+    runs as a script or is imported.
+    """
+    if not use_cache:
+        return parse_kicad_sym_uncached(lib_path)
+
+    cached = load_cached(
+        lib_path, lib_path.parent / SYMBOL_CACHE_NAME,
+        lambda path: {name: asdict(sym) for name, sym in parse_kicad_sym_uncached(path).items()},
+        version=SYMBOL_CACHE_VERSION)
+
+    symbols = {}
+    for name, fields in cached.items():
+        fields = dict(fields)
+        fields['pins'] = {pin_name: SymbolPin(**pin)
+                          for pin_name, pin in fields['pins'].items()}
+        symbols[name] = SymbolDef(**fields)
+    return symbols
+
+
+def parse_kicad_sym_uncached(lib_path: Path) -> Dict[str, SymbolDef]:
     """Parse a .kicad_sym file and extract symbol definitions."""
 
     content = lib_path.read_text(encoding='utf-8')
@@ -211,22 +315,19 @@ def parse_kicad_sym(lib_path: Path) -> Dict[str, SymbolDef]:
 
     def find_matching_paren(text: str, start: int) -> int:
         """Find the matching closing parenthesis."""
+        # Jump from paren to paren instead of stepping through every character
         depth = 0
-        i = start
-        while i < len(text):
-            if text[i] == '(':
+        for m in PAREN_RE.finditer(text, start):
+            if m.group() == '(':
                 depth += 1
-            elif text[i] == ')':
+            else:
                 depth -= 1
                 if depth == 0:
-                    return i
-            i += 1
+                    return m.start()
         return -1
 
-    # Find all top-level symbols (handle both tab and space indentation)
-    # Note: Some symbols have extra spaces before (in_bom, so we use \s+ instead of single space
-    pattern = re.compile(r'\n(\s+)\(symbol "([^"]+)"\s+\(in_bom')
-    for match in pattern.finditer(content):
+    # Find all top-level symbols
+    for match in SYMBOL_START_RE.finditer(content):
         indent = match.group(1)
         sym_name = match.group(2)
         # Find the opening paren of (symbol
@@ -239,17 +340,12 @@ def parse_kicad_sym(lib_path: Path) -> Dict[str, SymbolDef]:
         sym_content = content[paren_pos:end_pos + 1]
 
         # Skip sub-units (symbols containing _ followed by number_number)
-        if re.search(r'_\d+_\d+$', sym_name):
+        if SUBUNIT_RE.search(sym_name):
             continue
 
         # Parse pins
         pins = {}
-        pin_pattern = re.compile(
-            r'\(pin\s+(\w+)\s+\w+\s*\(at\s+([-\d.]+)\s+([-\d.]+)\s+(\d+)\)\s*\(length\s+([-\d.]+)\).*?\(name\s+"([^"]*)".*?\(number\s+"([^"]*)"',
-            re.DOTALL
-        )
-
-        for pin_match in pin_pattern.finditer(sym_content):
+        for pin_match in PIN_RE.finditer(sym_content):
             elec_type = pin_match.group(1)
             x = float(pin_match.group(2))
             y = float(pin_match.group(3))
@@ -270,8 +366,7 @@ def parse_kicad_sym(lib_path: Path) -> Dict[str, SymbolDef]:
 
         # Parse properties
         properties = {}
-        prop_pattern = re.compile(r'\(property "(\w+)" "([^"]*)"')
-        for prop_match in prop_pattern.finditer(sym_content):
+        for prop_match in PROPERTY_RE.finditer(sym_content):
             properties[prop_match.group(1)] = prop_match.group(2)
 
         # Calculate bounding box and asymmetric extents from pins
@@ -288,8 +383,7 @@ def parse_kicad_sym(lib_path: Path) -> Dict[str, SymbolDef]:
             if y_extent_down < 0:
                 y_extent_down = 0  # Symbol doesn't extend below origin
         else:
-            rect_pattern = re.compile(r'\(rectangle\s+\(start\s+([-\d.]+)\s+([-\d.]+)\)\s*\(end\s+([-\d.]+)\s+([-\d.]+)\)')
-            rect_match = rect_pattern.search(sym_content)
+            rect_match = RECT_RE.search(sym_content)
             if rect_match:
                 x1, y1 = float(rect_match.group(1)), float(rect_match.group(2))
                 x2, y2 = float(rect_match.group(3)), float(rect_match.group(4))
@@ -318,6 +412,65 @@ def parse_kicad_sym(lib_path: Path) -> Dict[str, SymbolDef]:
     return symbols
 
 
+def embed_symbol_lines(symbol: SymbolDef, lib_sym_name: str, indent: str = "\t\t") -> List[str]:
+    """
+    Rewrite a library symbol for embedding in a schematic's lib_symbols.
+
+    Returns the symbol's S-expression lines renamed to lib_sym_name
+    ("LIB:NAME"), with KiCad 9 attribute ordering and tab indentation.
+    """
+    # Rewrite the symbol with library prefix and proper format
+    raw = symbol.raw_sexp.strip()
+
+    # Replace symbol name with prefixed version and fix attribute ordering
+    # KiCad 9 expects: (symbol "LIB:NAME" \n (exclude_from_sim no) \n (in_bom yes) \n (on_board yes)
+    # Our source has: (symbol "NAME" (in_bom yes) (on_board yes)
+
+    # Extract in_bom and on_board values and remove them from the
+    # first line - only rewrite the text when they are present
+    in_bom = 'yes'
+    on_board = 'yes'
+    if '(in_bom' in raw:
+        in_bom_match = IN_BOM_RE.search(raw)
+        if in_bom_match:
+            in_bom = in_bom_match.group(1)
+            raw = IN_BOM_RE.sub('', raw)
+    if '(on_board' in raw:
+        on_board_match = ON_BOARD_RE.search(raw)
+        if on_board_match:
+            on_board = on_board_match.group(1)
+            raw = ON_BOARD_RE.sub('', raw)
+
+    # Replace symbol name with prefixed version
+    raw = re.sub(
+        r'\(symbol\s+"' + re.escape(symbol.name) + r'"',
+        f'(symbol "{lib_sym_name}"',
+        raw
+    )
+
+    # Insert properly formatted attributes after the symbol opening line
+    # Find the first newline after (symbol "NAME" and insert attributes
+    first_newline = raw.find('\n')
+    if first_newline > 0:
+        raw = (raw[:first_newline] +
+               '\n\t\t\t(exclude_from_sim no)' +
+               f'\n\t\t\t(in_bom {in_bom})' +
+               f'\n\t\t\t(on_board {on_board})' +
+               raw[first_newline:])
+
+    # Re-indent (convert 2-space to tabs)
+    out = []
+    for line in raw.split('\n'):
+        # Count leading spaces and convert to tabs
+        stripped = line.lstrip()
+        if not stripped:
+            continue
+        spaces = len(line) - len(stripped)
+        tabs = indent + "\t" * (spaces // 2)  # Base indent + converted spaces
+        out.append(tabs + stripped)
+    return out
+
+
 def build_lcsc_to_symbol(symbols: Dict[str, SymbolDef]) -> Dict[str, str]:
     """Build LCSC part number to symbol name mapping from parsed symbols."""
     mapping = {}
@@ -332,6 +485,12 @@ def build_lcsc_to_symbol(symbols: Dict[str, SymbolDef]) -> Dict[str, str]:
 # Parts with 3+ pins get doubled Y spacing for better label readability
 MIN_PINS_FOR_SCALING = 3
 
+# Per-line rewrite patterns for scale_symbol_y, compiled once
+AT_RE = re.compile(r'\(at\s+([-\d.]+)\s+([-\d.]+)\s+(\d+)\)')
+START_RE = re.compile(r'\(start\s+([-\d.]+)\s+([-\d.]+)\)')
+END_RE = re.compile(r'\(end\s+([-\d.]+)\s+([-\d.]+)\)')
+VALUE_AT_RE = re.compile(r'\(at\s+([-\d.]+)\s+([-\d.]+)\s+0\)')
+
 
 def scale_symbol_y(symbol: SymbolDef, scale: float) -> SymbolDef:
     """
@@ -376,43 +535,32 @@ def scale_symbol_y(symbol: SymbolDef, scale: float) -> SymbolDef:
         box_bottom = -symbol.height / 2
 
     # Scale Y in pin (at X Y angle) - only within pin definitions
-    def scale_pin_at(m):
+    def scale_pin_y(m):
         x = m.group(1)
         y = float(m.group(2)) * scale
         angle = m.group(3)
         return f'(at {x} {y:.2f} {angle})'
 
-    scaled_sexp = re.sub(
-        r'\(pin\s+\w+\s+\w+\s+\(at\s+([-\d.]+)\s+([-\d.]+)\s+(\d+)\)',
-        lambda m: f'(pin {m.group(0).split()[1]} {m.group(0).split()[2]} (at {m.group(0).split("(at ")[1].split()[0]} {float(m.group(0).split("(at ")[1].split()[1]) * scale:.2f} {m.group(0).split("(at ")[1].split()[2].rstrip(")")})',
-        symbol.raw_sexp
-    )
-
-    # Simpler approach: process line by line
+    # Process line by line
     lines = symbol.raw_sexp.split('\n')
     new_lines = []
     for line in lines:
         # Scale pin Y coordinates
         if '(pin ' in line and '(at ' in line:
-            def scale_pin_y(m):
-                x = m.group(1)
-                y = float(m.group(2)) * scale
-                angle = m.group(3)
-                return f'(at {x} {y:.2f} {angle})'
-            line = re.sub(r'\(at\s+([-\d.]+)\s+([-\d.]+)\s+(\d+)\)', scale_pin_y, line)
+            line = AT_RE.sub(scale_pin_y, line)
         # Update rectangle to fit pins (not scaled, recalculated)
         elif '(rectangle' in line and '(start' in line:
             # Extract X coordinates, use new Y bounds
-            start_match = re.search(r'\(start\s+([-\d.]+)\s+([-\d.]+)\)', line)
-            end_match = re.search(r'\(end\s+([-\d.]+)\s+([-\d.]+)\)', line)
+            start_match = START_RE.search(line)
+            end_match = END_RE.search(line)
             if start_match and end_match:
                 x1 = start_match.group(1)
                 x2 = end_match.group(1)
-                line = re.sub(r'\(start\s+[-\d.]+\s+[-\d.]+\)', f'(start {x1} {box_top:.2f})', line)
-                line = re.sub(r'\(end\s+[-\d.]+\s+[-\d.]+\)', f'(end {x2} {box_bottom:.2f})', line)
+                line = START_RE.sub(f'(start {x1} {box_top:.2f})', line)
+                line = END_RE.sub(f'(end {x2} {box_bottom:.2f})', line)
         # Rotate Value property 90 degrees
         elif '(property "Value"' in line:
-            line = re.sub(r'\(at\s+([-\d.]+)\s+([-\d.]+)\s+0\)', r'(at \1 \2 90)', line)
+            line = VALUE_AT_RE.sub(r'(at \1 \2 90)', line)
         new_lines.append(line)
 
     scaled_sexp = '\n'.join(new_lines)
@@ -447,7 +595,14 @@ def scale_symbol_y(symbol: SymbolDef, scale: float) -> SymbolDef:
 SHEET_WIDTH = 420.0
 SHEET_HEIGHT = 297.0
 SHEET_MARGIN = 20.0  # Margin from edges
-POWER_NETS = {'+3V3', 'VBAT', 'VBUS', 'VCC', '+5V', 'GND'}  # Power nets
+POWER_NETS = frozenset({'+3V3', 'VBAT', 'VBUS', 'VCC', '+5V', 'GND'})  # Power nets
+SUPPLY_NETS = POWER_NETS - {'GND'}  # Power nets other than ground
+# Power nets that get a PWR_FLAG. Only GND needs one - the other power nets
+# already have power output pins:
+# - +3V3: AMS1117 VOUT (power output)
+# - VBAT: TP4056 BAT (power output)
+# - VBUS: USB connector VBUS (power output in symbol)
+PWR_FLAG_NETS = frozenset({'GND'})
 GRID_SIZE = 2.54  # KiCad grid in mm
 ROUTING_CHANNEL = 5.0  # Extra space around parts for routing
 
@@ -455,7 +610,17 @@ ROUTING_CHANNEL = 5.0  # Extra space around parts for routing
 DECOUPLING_AREA_HEIGHT = 50.0  # mm reserved at bottom for decoupling caps
 DECOUPLING_AREA_TOP = SHEET_HEIGHT - SHEET_MARGIN - DECOUPLING_AREA_HEIGHT  # Y where decoupling area starts
 
-import random
+# Grid order of main parts (ICs first, then connectors, etc.), keyed by the
+# first character of the reference: (full prefix, rank). Unlisted refs go last.
+MAIN_PART_ORDER = {
+    'U': ('U', 0),
+    'J': ('J', 1),
+    'D': ('D', 2),
+    'E': ('ENC', 3),
+    'S': ('SW', 4),
+    'T': ('TP', 5),
+}
+MAIN_PART_ORDER_LAST = 6
 
 
 @dataclass
@@ -562,27 +727,30 @@ def compute_overlap_force(part: PartInstance, all_parts: List[PartInstance]) ->
     return total_force
 
 
-def compute_net_attraction(part: PartInstance, all_parts: List[PartInstance],
-                           net_connections: Dict[str, List[Tuple[str, str]]]) -> Vector:
+def build_connected_refs(net_connections: Dict[str, List[Tuple[str, str]]]) -> Dict[str, Set[str]]:
+    """Map each part ref to the refs it shares at least one net with."""
+    connected: Dict[str, Set[str]] = {}
+    for connections in net_connections.values():
+        refs_in_net = {ref for ref, pin in connections}
+        for ref in refs_in_net:
+            connected.setdefault(ref, set()).update(refs_in_net - {ref})
+    return connected
+
+
+def compute_net_attraction(part: PartInstance, connected_refs: Set[str],
+                           part_by_ref: Dict[str, PartInstance]) -> Vector:
     """
     Compute attractive force from net connections.
 
-    Parts connected by the same net attract each other.
+    Parts connected by the same net attract each other. connected_refs
+    comes from build_connected_refs(), computed once per placement run.
     """
     total_force = Vector(0, 0)
 
-    # Build set of parts this part is connected to
-    connected_refs = set()
-    for net_name, connections in net_connections.items():
-        refs_in_net = {ref for ref, pin in connections}
-        if part.ref in refs_in_net:
-            connected_refs.update(refs_in_net - {part.ref})
-
     if not connected_refs:
         return total_force
 
     # Compute force toward each connected part
-    part_by_ref = {p.ref: p for p in all_parts}
     force_count = 0
 
     for ref in connected_refs:
@@ -716,6 +884,10 @@ def force_directed_placement(
     if verbose:
         print(f"    Force-directed placement for {len(parts)} parts...")
 
+    # Net connectivity does not change during placement - index it once
+    connected = build_connected_refs(net_connections)
+    part_by_ref = {p.ref: p for p in parts}
+
     for phase, (speed, alpha, stability_coef) in enumerate(force_schedule):
         # Compute scale factor to balance attraction and repulsion
         # (simplified - SKiDL does this more elaborately)
@@ -731,7 +903,7 @@ def force_directed_placement(
 
             for part in parts:
                 # Attractive force from net connections (weighted by 1-alpha)
-                attr_force = compute_net_attraction(part, parts, net_connections)
+                attr_force = compute_net_attraction(part, connected.get(part.ref, set()), part_by_ref)
 
                 # Repulsive force from overlapping parts (weighted by alpha)
                 repel_force = compute_overlap_force(part, parts)
@@ -795,6 +967,9 @@ def place_parts_by_group(
     # Track symbols not found in library (populated by create_part_instance)
     missing_symbols: List[dict] = []
 
+    # Y-scaled symbol definitions, shared by all parts using the same symbol
+    scaled_symbols: Dict[str, SymbolDef] = {}
+
     # Helper function to create a PartInstance
     def create_part_instance(part_data: dict, position: Point) -> PartInstance:
         ref = part_data.get('ref', 'X?')
@@ -827,7 +1002,10 @@ def place_parts_by_group(
 
         # Scale Y coordinates for parts with multiple pins
         if len(symbol.pins) >= MIN_PINS_FOR_SCALING:
-            symbol = scale_symbol_y(symbol, 2.0)
+            scaled = scaled_symbols.get(symbol.name)
+            if scaled is None:
+                scaled = scaled_symbols[symbol.name] = scale_symbol_y(symbol, 2.0)
+            symbol = scaled
 
         return PartInstance(
             ref=ref,
@@ -847,11 +1025,18 @@ def place_parts_by_group(
     print(f"  Creating {len(parts)} part instances...")
 
     placed_parts: List[PartInstance] = []
+    # Mapping from semantic id to ref, built in the same pass (used in Step 2)
+    semantic_to_ref: Dict[str, str] = {}
     for part_data in parts:
         initial_pos = Point(SHEET_WIDTH / 2, SHEET_HEIGHT / 2)
         instance = create_part_instance(part_data, initial_pos)
         placed_parts.append(instance)
 
+        part_id = part_data.get('id', '')
+        ref = part_data.get('ref', '')
+        if part_id and ref:
+            semantic_to_ref[part_id] = ref
+
     # Validate: fail early if symbols are missing
     if missing_symbols:
         print("\n" + "="*60)
@@ -875,14 +1060,6 @@ def place_parts_by_group(
     # Step 2: Separate main parts from peripheral parts
     # ==========================================================================
 
-    # Build mapping from semantic id to ref from parts data
-    semantic_to_ref = {}
-    for part_data in parts:
-        part_id = part_data.get('id', '')
-        ref = part_data.get('ref', '')
-        if part_id and ref:
-            semantic_to_ref[part_id] = ref
-
     # Main parts (belongs_to=None) - will be placed in grid
     main_parts: List[PartInstance] = []
     # Peripheral parts grouped by their parent's ref
@@ -930,20 +1107,10 @@ def place_parts_by_group(
     # Sort main parts for consistent placement (ICs first, then connectors, etc.)
     def sort_key(p):
         ref = p.ref
-        if ref.startswith('U'):
-            return (0, ref)
-        elif ref.startswith('J'):
-            return (1, ref)
-        elif ref.startswith('D'):
-            return (2, ref)
-        elif ref.startswith('ENC'):
-            return (3, ref)
-        elif ref.startswith('SW'):
-            return (4, ref)
-        elif ref.startswith('TP'):
-            return (5, ref)
-        else:
-            return (6, ref)
+        entry = MAIN_PART_ORDER.get(ref[:1])
+        if entry and ref.startswith(entry[0]):
+            return (entry[1], ref)
+        return (MAIN_PART_ORDER_LAST, ref)
 
     main_parts.sort(key=sort_key)
 
@@ -975,14 +1142,12 @@ def place_parts_by_group(
 
     print("  Placing peripheral parts near connected pins...")
 
-    # Build net -> [(ref, pin_name)] mapping
-    net_to_pins: Dict[str, List[Tuple[str, str]]] = {}
+    # Build (net, ref) -> [pin_name] mapping
+    net_ref_pins: Dict[Tuple[str, str], List[str]] = {}
     for part in placed_parts:
         for pin_name, net_name in part.pins.items():
             if net_name:
-                if net_name not in net_to_pins:
-                    net_to_pins[net_name] = []
-                net_to_pins[net_name].append((part.ref, pin_name))
+                net_ref_pins.setdefault((net_name, part.ref), []).append(pin_name)
 
     for parent_ref, periph_list in peripheral_groups.items():
         parent = part_by_ref.get(parent_ref)
@@ -1001,12 +1166,11 @@ def place_parts_by_group(
                 if not net_name:
                     continue
                 # Check if parent has a pin on the same net
-                for ref, pin_name in net_to_pins.get(net_name, []):
-                    if ref == parent_ref:
-                        # Get pin position on parent
-                        pin_pos = get_pin_position(parent, pin_name)
-                        if pin_pos:
-                            connected_pins.append((pin_pos, pin_name))
+                for pin_name in net_ref_pins.get((net_name, parent_ref), ()):
+                    # Get pin position on parent
+                    pin_pos = get_pin_position(parent, pin_name)
+                    if pin_pos:
+                        connected_pins.append((pin_pos, pin_name))
 
             if connected_pins:
                 # Place peripheral near the first connected pin
@@ -1051,13 +1215,19 @@ def place_parts_by_group(
     # Step 5: Build net connections for force-directed refinement
     # ==========================================================================
 
-    net_connections: Dict[str, List[Tuple[str, str]]] = {}
-    for part in placed_parts:
-        for pin_name, net_name in part.pins.items():
-            if net_name:
-                if net_name not in net_connections:
-                    net_connections[net_name] = []
-                net_connections[net_name].append((part.ref, pin_name))
+    net_connections = build_net_connections(placed_parts)
+
+    # Split each net's connections by peripheral group in a single pass, so
+    # every group does not rescan all nets: parent ref -> net -> [(ref, pin)]
+    group_of = {p.ref: parent_ref
+                for parent_ref, periph_list in peripheral_groups.items()
+                for p in periph_list}
+    group_connections: Dict[str, Dict[str, List[Tuple[str, str]]]] = {}
+    for net_name, connections in net_connections.items():
+        for ref, pin in connections:
+            parent_ref = group_of.get(ref)
+            if parent_ref is not None:
+                group_connections.setdefault(parent_ref, {}).setdefault(net_name, []).append((ref, pin))
 
     # ==========================================================================
     # Step 6: Force-directed refinement for peripherals only (parent stays fixed)
@@ -1075,12 +1245,9 @@ def place_parts_by_group(
 
         # Only run force-directed on peripherals (not parent)
         # Get nets connecting peripherals to each other
-        periph_refs = {p.ref for p in periph_list}
-        periph_nets = {}
-        for net_name, connections in net_connections.items():
-            periph_conns = [(ref, pin) for ref, pin in connections if ref in periph_refs]
-            if len(periph_conns) >= 2:
-                periph_nets[net_name] = periph_conns
+        periph_nets = {net_name: periph_conns
+                       for net_name, periph_conns in group_connections.get(parent_ref, {}).items()
+                       if len(periph_conns) >= 2}
 
         if len(periph_list) > 1 and periph_nets:
             force_directed_placement(periph_list, periph_nets, max_iterations=100, verbose=False)
@@ -1102,9 +1269,6 @@ def place_parts_by_group(
 
     print("  Placing decoupling capacitors in separate area...")
 
-    # Power nets that indicate decoupling caps
-    POWER_NETS = {'+3V3', 'VBAT', 'VBUS', 'VCC', '+5V'}
-
     # Identify decoupling caps
     decoupling_caps = []
     for part in placed_parts:
@@ -1112,8 +1276,9 @@ def place_parts_by_group(
             continue
         nets = set(part.pins.values())
         has_gnd = 'GND' in nets
-        has_power = bool(nets & POWER_NETS)
+        has_power = bool(nets & SUPPLY_NETS)  # Power nets that indicate decoupling caps
         if has_gnd and has_power:
+            part.in_decoupling_area = True
             decoupling_caps.append(part)
 
     if decoupling_caps:
@@ -1219,9 +1384,6 @@ def place_parts_by_group(
     # Process parts - movable parts only
     movable_parts = [p for p in placed_parts if p.ref not in main_refs]
 
-    # Identify decoupling cap refs (already placed in decoupling area)
-    decoupling_refs = {cap.ref for cap in decoupling_caps}
-
     # Sort by size (larger parts first - harder to place)
     def part_area(p):
         b = get_part_bbox(p)
@@ -1237,10 +1399,9 @@ def place_parts_by_group(
                 total_overlaps += len(overlapping)
                 # Find a free position
                 # Decoupling caps can be placed in decoupling area; others cannot
-                is_decoupling = part.ref in decoupling_refs
                 original_pos = part.position
                 new_pos = find_free_position(part, placed_parts, original_pos,
-                                             allow_decoupling_area=is_decoupling)
+                                             allow_decoupling_area=part.in_decoupling_area)
                 part.position = new_pos
 
         if total_overlaps == 0:
@@ -1260,10 +1421,9 @@ def place_parts_by_group(
     print("  Constraining all parts to sheet bounds...")
     for part in placed_parts:
         half_w = part.symbol.width / 2 + 5  # Add margin for labels
-        is_decoupling = part.ref in decoupling_refs
         part.position = snap_to_grid(constrain_to_sheet(
             part.position,
-            allow_decoupling_area=is_decoupling,
+            allow_decoupling_area=part.in_decoupling_area,
             half_width=half_w,
             y_extent_up=part.symbol.y_extent_up + 5,
             y_extent_down=part.symbol.y_extent_down + 5
@@ -1276,15 +1436,14 @@ def place_parts_by_group(
             overlapping = get_overlapping_parts(part, placed_parts)
             if overlapping:
                 total_overlaps += len(overlapping)
-                is_decoupling = part.ref in decoupling_refs
                 half_w = part.symbol.width / 2 + 5
                 original_pos = part.position
                 new_pos = find_free_position(part, placed_parts, original_pos,
-                                             allow_decoupling_area=is_decoupling)
+                                             allow_decoupling_area=part.in_decoupling_area)
                 # Re-constrain to sheet bounds
                 part.position = snap_to_grid(constrain_to_sheet(
                     new_pos,
-                    allow_decoupling_area=is_decoupling,
+                    allow_decoupling_area=part.in_decoupling_area,
                     half_width=half_w,
                     y_extent_up=part.symbol.y_extent_up + 5,
                     y_extent_down=part.symbol.y_extent_down + 5
@@ -1453,36 +1612,28 @@ def generate_schematic(
     # Build shortened net name mapping
     net_name_map = shorten_net_names(list(label_positions.keys()))
 
-    # Identify power nets that need PWR_FLAG
-    # Only add PWR_FLAG to GND and input power nets from connectors
-    # Only GND needs PWR_FLAG - other power nets already have power output pins:
-    # - +3V3: AMS1117 VOUT (power output)
-    # - VBAT: TP4056 BAT (power output)
-    # - VBUS: USB connector VBUS (power output in symbol)
-    POWER_NETS_NEED_FLAG = {'GND'}  # Only GND has no power output pin
-    power_nets_used = set()
-    for net_name in label_positions.keys():
-        if net_name in POWER_NETS_NEED_FLAG:
-            power_nets_used.add(net_name)
+    # Identify power nets that need PWR_FLAG (see PWR_FLAG_NETS)
+    power_nets_used = PWR_FLAG_NETS & label_positions.keys()
 
     # Find pins that need no-connect flags
-    # These are pins that exist in the symbol but have no net assignment
+    # These are pins that exist in the symbol but have no net assignment.
+    # Walk the symbol's pins in library order (part.pins is a dict, so the
+    # membership test is O(1)); unlike a set difference this keeps the
+    # output order independent of string hash randomisation.
     no_connect_positions = []
     for part in parts:
-        # Get all pin names from the symbol definition
-        symbol_pin_names = set(part.symbol.pins.keys())
-        # Get pin names that have net assignments
-        connected_pin_names = set(part.pins.keys())
-        # Unconnected pins are in symbol but not in part.pins
-        unconnected_pin_names = symbol_pin_names - connected_pin_names
-
-        for pin_name in unconnected_pin_names:
+        connected_pins = part.pins
+        for pin_name in part.symbol.pins:
+            if pin_name in connected_pins:
+                continue
             pin_pos = get_pin_position(part, pin_name)
             if pin_pos:
                 no_connect_positions.append(pin_pos)
 
     sexp = SexpWriter()
 
+    _uuid_rng.seed(UUID_SEED)  # Reproducible UUIDs
+
     # Generate root UUID for the schematic
     root_uuid = generate_uuid()
 
@@ -1508,50 +1659,7 @@ def generate_schematic(
     for part in parts:
         lib_sym_name = f"{part.symbol.lib_name}:{part.symbol.name}"
         if lib_sym_name not in used_symbols and part.symbol.raw_sexp:
-            # Rewrite the symbol with library prefix and proper format
-            raw = part.symbol.raw_sexp.strip()
-
-            # Replace symbol name with prefixed version and fix attribute ordering
-            # KiCad 9 expects: (symbol "LIB:NAME" \n (exclude_from_sim no) \n (in_bom yes) \n (on_board yes)
-            # Our source has: (symbol "NAME" (in_bom yes) (on_board yes)
-
-            # First, extract in_bom and on_board values
-            in_bom_match = re.search(r'\(in_bom\s+(\w+)\)', raw)
-            on_board_match = re.search(r'\(on_board\s+(\w+)\)', raw)
-            in_bom = in_bom_match.group(1) if in_bom_match else 'yes'
-            on_board = on_board_match.group(1) if on_board_match else 'yes'
-
-            # Remove in_bom and on_board from the first line
-            raw = re.sub(r'\s*\(in_bom\s+\w+\)', '', raw)
-            raw = re.sub(r'\s*\(on_board\s+\w+\)', '', raw)
-
-            # Replace symbol name with prefixed version
-            raw = re.sub(
-                r'\(symbol\s+"' + re.escape(part.symbol.name) + r'"',
-                f'(symbol "{lib_sym_name}"',
-                raw
-            )
-
-            # Insert properly formatted attributes after the symbol opening line
-            # Find the first newline after (symbol "NAME" and insert attributes
-            first_newline = raw.find('\n')
-            if first_newline > 0:
-                raw = (raw[:first_newline] +
-                       '\n\t\t\t(exclude_from_sim no)' +
-                       f'\n\t\t\t(in_bom {in_bom})' +
-                       f'\n\t\t\t(on_board {on_board})' +
-                       raw[first_newline:])
-
-            # Write with proper indentation (convert 2-space to tabs)
-            for line in raw.split('\n'):
-                # Count leading spaces and convert to tabs
-                stripped = line.lstrip()
-                if not stripped:
-                    continue
-                spaces = len(line) - len(stripped)
-                tabs = "\t\t" + "\t" * (spaces // 2)  # Base indent + converted spaces
-                sexp.lines.append(tabs + stripped)
-
+            sexp.lines.extend(embed_symbol_lines(part.symbol, lib_sym_name))
             used_symbols.add(lib_sym_name)
 
     # Add PWR_FLAG symbol if we have power nets
@@ -1621,6 +1729,19 @@ def generate_schematic(
     # Direction is determined by pin orientation to place label outside IC
     STUB_LENGTH = 2.54  # 1 grid unit stub length (minimum)
 
+    # Index pin orientation by (net, position) once, rather than scanning
+    # every part's pins for every label. Within a part the first matching
+    # pin counts; across parts the later part wins (as the old scan did).
+    pin_rotation_at = {}
+    for part in parts:
+        part_rotations = {}
+        for pin_name, pnet in part.pins.items():
+            pin_pos = get_pin_position(part, pin_name)
+            if pin_pos:
+                key = (pnet, round(pin_pos.x, 2), round(pin_pos.y, 2))
+                part_rotations.setdefault(key, part.symbol.pins[pin_name].rotation)
+        pin_rotation_at.update(part_rotations)
+
     for net_name, positions in label_positions.items():
         for pos in positions:
             # Determine stub direction based on which part this pin belongs to
@@ -1628,39 +1749,30 @@ def generate_schematic(
             stub_dx, stub_dy = STUB_LENGTH, 0
             label_angle = 0
             justify = "left"
-
-            # Find which part owns this pin position to get pin orientation
             vjustify = "bottom"  # Vertical justify for label
-            for part in parts:
-                for pin_name, pnet in part.pins.items():
-                    if pnet == net_name:
-                        pin_pos = get_pin_position(part, pin_name)
-                        if pin_pos and abs(pin_pos.x - pos.x) < 0.1 and abs(pin_pos.y - pos.y) < 0.1:
-                            # Found the pin - get its orientation
-                            pin = part.symbol.pins.get(pin_name)
-                            if pin:
-                                rot = pin.rotation
-                                # Pin rotation is direction FROM connection point TOWARD IC body
-                                # Stub should go in OPPOSITE direction (away from IC)
-                                if rot == 0:    # Pin goes right toward IC -> stub goes LEFT
-                                    stub_dx, stub_dy = -STUB_LENGTH, 0
-                                    label_angle = 0
-                                    justify = "right"
-                                elif rot == 180:  # Pin goes left toward IC -> stub goes RIGHT
-                                    stub_dx, stub_dy = STUB_LENGTH, 0
-                                    label_angle = 0
-                                    justify = "left"
-                                elif rot == 90:   # Pin goes up toward IC -> stub goes DOWN (below part)
-                                    stub_dx, stub_dy = 0, STUB_LENGTH  # Y increases downward in schematic
-                                    label_angle = 90
-                                    justify = "right"  # Text flows away from stub end
-                                    vjustify = "bottom"
-                                elif rot == 270:  # Pin goes down toward IC -> stub goes UP (above part)
-                                    stub_dx, stub_dy = 0, -STUB_LENGTH
-                                    label_angle = 90
-                                    justify = "left"  # Text flows away from stub end
-                                    vjustify = "bottom"
-                            break
+
+            # Look up the orientation of the pin at this position
+            rot = pin_rotation_at.get((net_name, round(pos.x, 2), round(pos.y, 2)))
+            # Pin rotation is direction FROM connection point TOWARD IC body
+            # Stub should go in OPPOSITE direction (away from IC)
+            if rot == 0:    # Pin goes right toward IC -> stub goes LEFT
+                stub_dx, stub_dy = -STUB_LENGTH, 0
+                label_angle = 0
+                justify = "right"
+            elif rot == 180:  # Pin goes left toward IC -> stub goes RIGHT
+                stub_dx, stub_dy = STUB_LENGTH, 0
+                label_angle = 0
+                justify = "left"
+            elif rot == 90:   # Pin goes up toward IC -> stub goes DOWN (below part)
+                stub_dx, stub_dy = 0, STUB_LENGTH  # Y increases downward in schematic
+                label_angle = 90
+                justify = "right"  # Text flows away from stub end
+                vjustify = "bottom"
+            elif rot == 270:  # Pin goes down toward IC -> stub goes UP (above part)
+                stub_dx, stub_dy = 0, -STUB_LENGTH
+                label_angle = 90
+                justify = "left"  # Text flows away from stub end
+                vjustify = "bottom"
 
             stub_end_x = pos.x + stub_dx
             stub_end_y = pos.y + stub_dy
@@ -1900,8 +2012,10 @@ def generate_schematic(
     output = sexp.get_output()
 
     if output_path:
-        output_path.write_text(output, encoding='utf-8')
-        print(f"Generated: {output_path}")
+        if write_if_changed(output_path, output):
+            print(f"Generated: {output_path}")
+        else:
+            print(f"Unchanged: {output_path}")
 
     return output
 
@@ -1927,8 +2041,7 @@ def generate_from_pin_model(
     """
 
     # Load pin model
-    with open(pin_model_path, 'r', encoding='utf-8') as f:
-        model = json.load(f)
+    model = load_json(pin_model_path)
 
     parts_data = model.get('parts', [])
     nets_list = model.get('nets', [])
@@ -1993,8 +2106,7 @@ def generate_debug_schematic(
     import csv
 
     # Load pin model
-    with open(pin_model_path, 'r', encoding='utf-8') as f:
-        model = json.load(f)
+    model = load_json(pin_model_path)
 
     parts_data = model.get('parts', [])
 
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+LCSC part number to symbol name mapping shared by the schematic generators.
+
+Used by generate_kicad_project.py, generate_skidl_v2.py and
+generate_skidl_schematic.py so the three stay in sync.
+"""
+
+# LCSC part number to symbol name mapping
+# Maps LCSC codes to our custom symbol library names
+LCSC_TO_SYMBOL = {
+    # ICs
+    "C2913206": "ESP32-S3-MINI-1-N8",
+    "C195417": "SI4735-D60-GU",
+    "C7971": "TDA1306T",
+    "C16581": "TP4056",
+    "C6186": "AMS1117-3.3",
+    "C7519": "USBLC6-2SC6",
+    # Connectors
+    "C393939": "TYPE-C-31-M-12",
+    "C131337": "S2B-PH-K-S",
+    "C145819": "PJ-327A",
+    "C124378": "Header-1x04",
+    "C238128": "TestPoint",
+    # UI components
+    "C470747": "EC11E18244A5",
+    "C127509": "TS-1102S",
+    "C2761795": "WS2812B-B",
+    # Passive components
+    "C32346": "Crystal-32.768kHz",
+    # Resistors - all map to generic "R" symbol
+    "C23186": "R",   # 5.1k
+    "C22975": "R",   # 2k
+    "C25804": "R",   # 10k
+    "C25900": "R",   # 4.7k
+    "C22775": "R",   # 100R
+    # Capacitors - all map to generic "C" symbol
+    "C45783": "C",   # 22uF
+    "C134760": "C",  # 220uF
+    "C15850": "C",   # 10uF
+    "C15849": "C",   # 1uF
+    "C14663": "C",   # 100nF
+    "C1653": "C",    # 22pF
+}
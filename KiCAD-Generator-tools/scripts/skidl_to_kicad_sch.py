@@ -18,15 +18,18 @@ Usage:
     )
 """
 
+import os
 import re
 import uuid
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 
+from file_cache import load_cached
 
-@dataclass
+
+@dataclass(slots=True)  # One per library pin; slots keep them small
 class SymbolPin:
     """Pin information from symbol library"""
     name: str
@@ -45,33 +48,67 @@ class SymbolDef:
     bbox: Tuple[float, float, float, float]  # minx, miny, maxx, maxy
 
 
-def parse_symbol_library(lib_path: Path) -> Dict[str, SymbolDef]:
+# Library patterns, compiled once rather than per symbol
+# Symbol definitions: (symbol "NAME" ... ENDSYMBOL)
+SYMBOL_RE = re.compile(
+    r'\(symbol\s+"([^"]+)"\s+\(in_bom[^)]+\)\s+\(on_board[^)]+\)(.*?)\n  \)',
+    re.DOTALL
+)
+# Pins: (pin TYPE STYLE (at X Y ROT) (length L) (name "NAME"...) (number "NUM"...))
+# Use non-greedy match to skip effects sections with nested parens
+PIN_RE = re.compile(
+    r'\(pin\s+\w+\s+\w+\s+\(at\s+([-\d.]+)\s+([-\d.]+)\s+(\d+)\)\s+\(length\s+([-\d.]+)\)\s+\(name\s+"([^"]+)".*?\(number\s+"([^"]+)"',
+    re.DOTALL
+)
+RECT_RE = re.compile(r'\(rectangle\s+\(start\s+([-\d.]+)\s+([-\d.]+)\)\s+\(end\s+([-\d.]+)\s+([-\d.]+)\)')
+
+
+# Parsed-library cache, stored next to the library and keyed by its
+# path, mtime and size. Bump the version when SymbolDef/SymbolPin change.
+SYMBOL_CACHE_NAME = '.skidl_symbol_defs.pkl'
+SYMBOL_CACHE_VERSION = 1
+
+
+def parse_symbol_library(lib_path: Path, use_cache: bool = True) -> Dict[str, SymbolDef]:
+    """
+    Parse KiCad symbol library to extract pin positions.
+
+    The result is cached in a sidecar pickle so an unchanged library is
+    not re-parsed on every run.
+    """
+    lib_path = Path(lib_path)
+    if not use_cache:
+        return parse_symbol_library_uncached(lib_path)
+
+    cached = load_cached(
+        lib_path, lib_path.parent / SYMBOL_CACHE_NAME,
+        lambda path: {name: asdict(sym) for name, sym in parse_symbol_library_uncached(path).items()},
+        version=SYMBOL_CACHE_VERSION)
+
+    return {
+        name: SymbolDef(
+            name=fields['name'],
+            pins={pin_name: SymbolPin(**pin) for pin_name, pin in fields['pins'].items()},
+            bbox=tuple(fields['bbox']),
+        )
+        for name, fields in cached.items()
+    }
+
+
+def parse_symbol_library_uncached(lib_path: Path) -> Dict[str, SymbolDef]:
     """Parse KiCad symbol library to extract pin positions."""
 
     symbols = {}
     content = lib_path.read_text()
 
     # Find all symbol definitions
-    # Pattern: (symbol "NAME" ... ENDSYMBOL)
-    symbol_pattern = re.compile(
-        r'\(symbol\s+"([^"]+)"\s+\(in_bom[^)]+\)\s+\(on_board[^)]+\)(.*?)\n  \)',
-        re.DOTALL
-    )
-
-    for match in symbol_pattern.finditer(content):
+    for match in SYMBOL_RE.finditer(content):
         sym_name = match.group(1)
         sym_content = match.group(2)
 
         pins = {}
 
-        # Find pins: (pin TYPE STYLE (at X Y ROT) (length L) (name "NAME"...) (number "NUM"...))
-        # Use non-greedy match to skip effects sections with nested parens
-        pin_pattern = re.compile(
-            r'\(pin\s+\w+\s+\w+\s+\(at\s+([-\d.]+)\s+([-\d.]+)\s+(\d+)\)\s+\(length\s+([-\d.]+)\)\s+\(name\s+"([^"]+)".*?\(number\s+"([^"]+)"',
-            re.DOTALL
-        )
-
-        for pin_match in pin_pattern.finditer(sym_content):
+        for pin_match in PIN_RE.finditer(sym_content):
             x = float(pin_match.group(1))
             y = float(pin_match.group(2))
             rot = int(pin_match.group(3))
@@ -89,8 +126,7 @@ def parse_symbol_library(lib_path: Path) -> Dict[str, SymbolDef]:
             )
 
         # Calculate bounding box from rectangle if present
-        rect_pattern = re.compile(r'\(rectangle\s+\(start\s+([-\d.]+)\s+([-\d.]+)\)\s+\(end\s+([-\d.]+)\s+([-\d.]+)\)')
-        rect_match = rect_pattern.search(sym_content)
+        rect_match = RECT_RE.search(sym_content)
         if rect_match:
             x1, y1 = float(rect_match.group(1)), float(rect_match.group(2))
             x2, y2 = float(rect_match.group(3)), float(rect_match.group(4))
@@ -118,8 +154,50 @@ def get_pin_endpoint(pin: SymbolPin, sym_x: float, sym_y: float) -> Tuple[float,
     return (sym_x + pin.x, sym_y - pin.y)
 
 
+# Placed symbol block (one entry in the output line list)
+SYMBOL_INSTANCE_TEMPLATE = (
+    '  (symbol (lib_id "{lib_id}") (at {x:.2f} {y:.2f} 0)\n'
+    '    (uuid "{uuid}")\n'
+    '    (property "Reference" "{ref}" (at {x:.2f} {ref_y:.2f} 0)\n'
+    '      (effects (font (size 1.27 1.27))))\n'
+    '    (property "Value" "{value}" (at {x:.2f} {value_y:.2f} 0)\n'
+    '      (effects (font (size 1.27 1.27))))\n'
+    '    (property "Footprint" "{footprint}" (at {x:.2f} {footprint_y:.2f} 0)\n'
+    '      (effects (font (size 1.27 1.27)) hide))\n'
+    '    (property "LCSC" "{lcsc}" (at {x:.2f} {lcsc_y:.2f} 0)\n'
+    '      (effects (font (size 1.27 1.27)) hide))\n'
+    '    (instances (project "RadioReceiver" (path "/" (reference "{ref}") (unit 1))))\n'
+    '  )'
+)
+
+# Net label block (one entry in the output line list)
+NET_LABEL_TEMPLATE = (
+    '  (label "{net_name}" (at {x:.2f} {y:.2f} {rotation}) (fields_autoplaced yes)\n'
+    '    (effects (font (size 1.27 1.27)) (justify left))\n'
+    '    (uuid "{uuid}"))'
+)
+
+# Label offset and rotation by pin rotation (0=right, 90=up, 180=left,
+# 270=down): labels sit just outside the pin end, facing away from the body
+LABEL_PLACEMENT = {
+    0: (-2, 0, 0),    # Offset left of pin
+    180: (2, 0, 0),   # Offset right of pin
+    90: (0, 2, 90),
+    270: (0, -2, 90),
+}
+
+
+# UUIDs are produced in batches from a single os.urandom() read
+UUID_BATCH_SIZE = 256
+_uuid_pool: List[str] = []
+
+
 def generate_uuid() -> str:
-    return str(uuid.uuid4())
+    if not _uuid_pool:
+        buf = os.urandom(16 * UUID_BATCH_SIZE)
+        _uuid_pool.extend(str(uuid.UUID(bytes=buf[i:i + 16], version=4))
+                          for i in range(0, len(buf), 16))
+    return _uuid_pool.pop()
 
 
 def generate_kicad_schematic(
@@ -178,6 +256,7 @@ def generate_kicad_schematic(
     # Place symbols
     col = 0
     row = 0
+    format_symbol = SYMBOL_INSTANCE_TEMPLATE.format
 
     for part in circuit.parts:
         # Get symbol name
@@ -196,31 +275,19 @@ def generate_kicad_schematic(
         y = start_y + row * y_spacing
 
         # Symbol instance
-        sym_uuid = generate_uuid()
         lib_name = "JLCPCB"
-
-        lines.append(f'  (symbol (lib_id "{lib_name}:{sym_name}") (at {x:.2f} {y:.2f} 0)')
-        lines.append(f'    (uuid "{sym_uuid}")')
-        lines.append(f'    (property "Reference" "{part.ref}" (at {x:.2f} {y - 5:.2f} 0)')
-        lines.append('      (effects (font (size 1.27 1.27))))')
-
-        value = getattr(part, 'value', sym_name) or sym_name
-        lines.append(f'    (property "Value" "{value}" (at {x:.2f} {y + 5:.2f} 0)')
-        lines.append('      (effects (font (size 1.27 1.27))))')
-
-        footprint = getattr(part, 'footprint', '') or ''
-        lines.append(f'    (property "Footprint" "{footprint}" (at {x:.2f} {y + 7:.2f} 0)')
-        lines.append('      (effects (font (size 1.27 1.27)) hide))')
-
-        lcsc = getattr(part, 'lcsc', '') or ''
-        lines.append(f'    (property "LCSC" "{lcsc}" (at {x:.2f} {y + 9:.2f} 0)')
-        lines.append('      (effects (font (size 1.27 1.27)) hide))')
-
-        lines.append(f'    (instances (project "RadioReceiver" (path "/" (reference "{part.ref}") (unit 1))))')
-        lines.append('  )')
+        lines.append(format_symbol(
+            lib_id=f"{lib_name}:{sym_name}",
+            x=x, y=y,
+            uuid=generate_uuid(),
+            ref=part.ref, ref_y=y - 5,
+            value=getattr(part, 'value', sym_name) or sym_name, value_y=y + 5,
+            footprint=getattr(part, 'footprint', '') or '', footprint_y=y + 7,
+            lcsc=getattr(part, 'lcsc', '') or '', lcsc_y=y + 9,
+        ))
 
         # Add net labels for each connected pin
-        for pin in part.pins:
+        for pin_idx, pin in enumerate(part.pins):
             if pin.net and pin.net.name:
                 net_name = pin.net.name
 
@@ -230,26 +297,12 @@ def generate_kicad_schematic(
                     # Calculate label position at pin endpoint
                     label_x, label_y = get_pin_endpoint(pin_def, x, y)
 
-                    # Determine label rotation based on pin orientation
-                    # Pin rotation: 0=right, 90=up, 180=left, 270=down
                     # Label should face outward from symbol
-                    if pin_def.rotation == 0:
-                        label_rot = 0
-                        label_x -= 2  # Offset left of pin
-                    elif pin_def.rotation == 180:
-                        label_rot = 0
-                        label_x += 2  # Offset right of pin
-                    elif pin_def.rotation == 90:
-                        label_rot = 90
-                        label_y += 2
-                    else:  # 270
-                        label_rot = 90
-                        label_y -= 2
-
-                    net_labels.append((net_name, label_x, label_y, label_rot))
+                    dx, dy, label_rot = LABEL_PLACEMENT.get(pin_def.rotation, LABEL_PLACEMENT[270])
+                    net_labels.append((net_name, label_x + dx, label_y + dy, label_rot))
                 else:
-                    # Fallback: place label near symbol
-                    net_labels.append((net_name, x + 20, y + row * 2.54, 0))
+                    # Fallback: place label near symbol, one row per pin
+                    net_labels.append((net_name, x + 20, y + pin_idx * 2.54, 0))
 
         # Move to next position
         col += 1
@@ -260,18 +313,12 @@ def generate_kicad_schematic(
     # Add net labels
     lines.append('')
     lines.append('  ; Net labels for connectivity')
-    for net_name, lx, ly, rot in net_labels:
-        justify = "left" if rot == 0 else "left"
-        lines.append(f'  (label "{net_name}" (at {lx:.2f} {ly:.2f} {rot}) (fields_autoplaced yes)')
-        lines.append(f'    (effects (font (size 1.27 1.27)) (justify {justify}))')
-        lines.append(f'    (uuid "{generate_uuid()}"))')
-
-    # Power symbols for common nets
-    power_nets = {"+3V3", "GND", "VBAT", "VBUS"}
-    for net in circuit.nets:
-        if net.name in power_nets:
-            # Add power port symbols
-            pass  # Could add power symbols here
+    format_label = NET_LABEL_TEMPLATE.format
+    lines.extend(format_label(net_name=net_name, x=lx, y=ly, rotation=rot, uuid=generate_uuid())
+                 for net_name, lx, ly, rot in net_labels)
+
+    # Power port symbols (+3V3, GND, VBAT, VBUS) are not emitted yet; the net labels
+    # above already carry their connectivity
 
     # Footer
     lines.append('')
@@ -14,6 +14,9 @@ import yaml
 from pathlib import Path
 from datetime import datetime
 
+from validate_step5 import POWER_NET_PATTERNS
+from yaml_loader import YamlLoader
+
 
 def load_yaml(filepath: Path) -> dict | None:
     """Load YAML file, return None if missing or invalid."""
@@ -21,7 +24,7 @@ def load_yaml(filepath: Path) -> dict | None:
         return None
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=YamlLoader)
     except yaml.YAMLError:
         return None
 
@@ -119,12 +122,8 @@ def summarize():
             print(f"    {pfx}: {by_prefix[pfx]}")
 
         # Check for TBD values
-        tbd_count = 0
-        for p in parts:
-            if 'TBD' in str(p.get('part', '')).upper():
-                tbd_count += 1
-            if 'TBD' in str(p.get('package', '')).upper():
-                tbd_count += 1
+        tbd_count = sum('TBD' in str(p.get(field, '')).upper()
+                        for p in parts for field in ('part', 'package'))
         if tbd_count > 0:
             print(f"  WARNING: {tbd_count} unresolved TBD values")
 
@@ -148,7 +147,7 @@ def summarize():
         print(f"  Test points: {tp_count}")
 
         # Power nets
-        power_nets = [n for n in nets.keys() if any(p in n.upper() for p in ['GND', 'VCC', 'VDD', 'BAT', '+3V', '+5V', '+12V'])]
+        power_nets = [n for n in nets if any(p in n.upper() for p in POWER_NET_PATTERNS)]
         if power_nets:
             print(f"  Power nets: {', '.join(power_nets)}")
 
@@ -16,6 +16,21 @@ import sys
 from pathlib import Path
 from collections import defaultdict
 
+# Try to import orjson for faster JSON loading, fall back to json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def load_model(filepath: Path) -> dict:
+    """Load pin_model.json (raises json.JSONDecodeError on bad input)."""
+    if HAS_ORJSON:
+        return orjson.loads(filepath.read_bytes())  # orjson's error subclasses it
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 
 def validate_pin_model(filepath: Path) -> list:
     """Validate pin model and return list of errors."""
@@ -24,8 +39,7 @@ def validate_pin_model(filepath: Path) -> list:
 
     # Load JSON
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            model = json.load(f)
+        model = load_model(filepath)
     except json.JSONDecodeError as e:
         return [f"JSON parse error: {e}"], []
 
@@ -133,8 +147,7 @@ def main():
                 print(f"  WARN: {warning}")
 
         # Load and print summary
-        with open(filepath, 'r', encoding='utf-8') as f:
-            model = json.load(f)
+        model = load_model(filepath)
 
         stats = model.get('statistics', {})
         print(f"\nSummary:")
@@ -144,8 +157,9 @@ def main():
 
         # Check completeness
         parts = model.get('parts', [])
-        parts_with_pins = sum(1 for p in parts if p.get('pins'))
-        parts_without_pins = sum(1 for p in parts if not p.get('pins'))
+        missing_pins = [p for p in parts if not p.get('pins')]
+        parts_without_pins = len(missing_pins)
+        parts_with_pins = len(parts) - parts_without_pins
 
         print(f"\nCompleteness:")
         print(f"  Parts with pin mappings: {parts_with_pins}")
@@ -153,9 +167,8 @@ def main():
 
         if parts_without_pins > 0:
             print("\n  Missing pins for:")
-            for p in parts:
-                if not p.get('pins'):
-                    print(f"    - {p.get('ref')} ({p.get('id')})")
+            for p in missing_pins:
+                print(f"    - {p.get('ref')} ({p.get('id')})")
 
         sys.exit(0)
 
@@ -13,35 +13,37 @@ import sys
 import yaml
 from pathlib import Path
 
+from yaml_loader import YamlLoader
+
 REQUIRED_FIELDS = ['id', 'name', 'suggested_part', 'category', 'quantity']
 VALID_CATEGORIES = ['microcontroller', 'radio', 'power', 'connector', 'ui', 'sensor', 'passive', 'other']
 
 
-def validate(filepath: Path) -> list:
-    """Validate step1 file and return list of errors."""
+def validate(filepath: Path) -> tuple:
+    """Validate step1 file and return (errors, parsed data)."""
     errors = []
 
     # Check file exists
     if not filepath.exists():
-        return [f"File not found: {filepath}"]
+        return [f"File not found: {filepath}"], None
 
     # Parse YAML
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YamlLoader)
     except yaml.YAMLError as e:
-        return [f"YAML parse error: {e}"]
+        return [f"YAML parse error: {e}"], None
 
     if not data:
-        return ["File is empty"]
+        return ["File is empty"], data
 
     # Check primary_parts exists
     if 'primary_parts' not in data:
-        return ["Missing 'primary_parts' key"]
+        return ["Missing 'primary_parts' key"], data
 
     parts = data['primary_parts']
     if not isinstance(parts, list):
-        return ["'primary_parts' must be a list"]
+        return ["'primary_parts' must be a list"], data
 
     if len(parts) == 0:
         errors.append("WARNING: No primary parts defined")
@@ -84,7 +86,7 @@ def validate(filepath: Path) -> list:
             if not isinstance(qty, int) or qty < 1:
                 errors.append(f"{prefix} ({part_id}): quantity must be positive integer, got '{qty}'")
 
-    return errors
+    return errors, data
 
 
 def main():
@@ -94,7 +96,7 @@ def main():
     print(f"Validating: {filepath}")
     print("=" * 60)
 
-    errors = validate(filepath)
+    errors, data = validate(filepath)
 
     if errors:
         print("VALIDATION FAILED\n")
@@ -105,8 +107,6 @@ def main():
     else:
         print("✅ VALIDATION PASSED")
         # Print summary
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
         parts = data.get('primary_parts', [])
         print(f"\nSummary: {len(parts)} primary parts defined")
         sys.exit(0)
@@ -14,34 +14,36 @@ import sys
 import yaml
 from pathlib import Path
 
+from yaml_loader import YamlLoader
+
 REQUIRED_FIELDS = ['id', 'name', 'part', 'category', 'quantity', 'belongs_to']
 
 
-def validate(filepath: Path) -> list:
-    """Validate step2 file and return list of errors."""
+def validate(filepath: Path) -> tuple:
+    """Validate step2 file and return (errors, parsed data)."""
     errors = []
 
     # Check file exists
     if not filepath.exists():
-        return [f"File not found: {filepath}"]
+        return [f"File not found: {filepath}"], None
 
     # Parse YAML
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YamlLoader)
     except yaml.YAMLError as e:
-        return [f"YAML parse error: {e}"]
+        return [f"YAML parse error: {e}"], None
 
     if not data:
-        return ["File is empty"]
+        return ["File is empty"], data
 
     # Check parts exists
     if 'parts' not in data:
-        return ["Missing 'parts' key"]
+        return ["Missing 'parts' key"], data
 
     parts = data['parts']
     if not isinstance(parts, list):
-        return ["'parts' must be a list"]
+        return ["'parts' must be a list"], data
 
     if len(parts) == 0:
         errors.append("WARNING: No parts defined")
@@ -108,7 +110,7 @@ def validate(filepath: Path) -> list:
     if primary_count == 0:
         errors.append("WARNING: No primary parts (belongs_to: null) found")
 
-    return errors
+    return errors, data
 
 
 def main():
@@ -118,7 +120,7 @@ def main():
     print(f"Validating: {filepath}")
     print("=" * 60)
 
-    errors = validate(filepath)
+    errors, data = validate(filepath)
 
     if errors:
         print("VALIDATION FAILED\n")
@@ -129,8 +131,6 @@ def main():
     else:
         print("✅ VALIDATION PASSED")
         # Print summary
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
         parts = data.get('parts', [])
         primary = sum(1 for p in parts if p.get('belongs_to') is None)
         supporting = len(parts) - primary
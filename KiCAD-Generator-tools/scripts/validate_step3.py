@@ -13,34 +13,36 @@ import sys
 import yaml
 from pathlib import Path
 
+from yaml_loader import YamlLoader
+
 REQUIRED_DECISION_FIELDS = ['topic', 'options', 'selected', 'rationale']
 
 
-def validate(filepath: Path) -> list:
-    """Validate step3 file and return list of errors."""
+def validate(filepath: Path) -> tuple:
+    """Validate step3 file and return (errors, parsed data)."""
     errors = []
 
     # Check file exists
     if not filepath.exists():
-        return [f"File not found: {filepath}"]
+        return [f"File not found: {filepath}"], None
 
     # Parse YAML
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YamlLoader)
     except yaml.YAMLError as e:
-        return [f"YAML parse error: {e}"]
+        return [f"YAML parse error: {e}"], None
 
     if not data:
-        return ["File is empty"]
+        return ["File is empty"], data
 
     # Check decisions exists
     if 'decisions' not in data:
-        return ["Missing 'decisions' key"]
+        return ["Missing 'decisions' key"], data
 
     decisions = data['decisions']
     if not isinstance(decisions, list):
-        return ["'decisions' must be a list"]
+        return ["'decisions' must be a list"], data
 
     if len(decisions) == 0:
         errors.append("WARNING: No decisions defined")
@@ -96,7 +98,7 @@ def validate(filepath: Path) -> list:
         if selected and (not rationale or str(rationale).strip() == ''):
             errors.append(f"{prefix} ({topic}): Missing rationale for selection")
 
-    return errors
+    return errors, data
 
 
 def main():
@@ -106,12 +108,17 @@ def main():
     print(f"Validating: {filepath}")
     print("=" * 60)
 
-    errors = validate(filepath)
+    errors, data = validate(filepath)
 
-    # Separate pending, warnings, and errors
-    pending = [e for e in errors if e.startswith("PENDING")]
-    warnings = [e for e in errors if e.startswith("WARNING")]
-    real_errors = [e for e in errors if not e.startswith("WARNING") and not e.startswith("PENDING")]
+    # Separate pending, warnings, and errors (single pass)
+    pending, warnings, real_errors = [], [], []
+    for e in errors:
+        if e.startswith("PENDING"):
+            pending.append(e)
+        elif e.startswith("WARNING"):
+            warnings.append(e)
+        else:
+            real_errors.append(e)
 
     if real_errors:
         print("VALIDATION FAILED\n")
@@ -141,8 +148,6 @@ def main():
                 print(f"  {warning}")
 
         # Print summary
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
         decisions = data.get('decisions', [])
         print(f"\nSummary: {len(decisions)} decisions documented")
 
@@ -14,38 +14,40 @@ import sys
 import yaml
 from pathlib import Path
 
+from yaml_loader import YamlLoader
+
 REQUIRED_FIELDS = ['id', 'name', 'part', 'package', 'prefix', 'category', 'quantity', 'belongs_to']
 VALID_PREFIXES = ['R', 'C', 'U', 'D', 'J', 'SW', 'Y', 'L', 'F', 'ENC', 'ANT', 'TP', 'FB']
 
 
-def validate(filepath: Path) -> list:
-    """Validate step4 file and return list of errors."""
+def validate(filepath: Path) -> tuple:
+    """Validate step4 file and return (errors, parsed data)."""
     errors = []
 
     # Check file exists
     if not filepath.exists():
-        return [f"File not found: {filepath}"]
+        return [f"File not found: {filepath}"], None
 
     # Parse YAML
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YamlLoader)
     except yaml.YAMLError as e:
-        return [f"YAML parse error: {e}"]
+        return [f"YAML parse error: {e}"], None
 
     if not data:
-        return ["File is empty"]
+        return ["File is empty"], data
 
     # Check parts exists
     if 'parts' not in data:
-        return ["Missing 'parts' key"]
+        return ["Missing 'parts' key"], data
 
     parts = data['parts']
     if not isinstance(parts, list):
-        return ["'parts' must be a list"]
+        return ["'parts' must be a list"], data
 
     if len(parts) == 0:
-        return ["No parts defined - cannot have empty BOM"]
+        return ["No parts defined - cannot have empty BOM"], data
 
     # Track IDs for uniqueness
     seen_ids = set()
@@ -93,7 +95,7 @@ def validate(filepath: Path) -> list:
         if 'lcsc_hint' not in part:
             errors.append(f"WARNING: {prefix} ({part_id}): Missing lcsc_hint for JLCPCB lookup")
 
-    return errors
+    return errors, data
 
 
 def main():
@@ -103,11 +105,15 @@ def main():
     print(f"Validating: {filepath}")
     print("=" * 60)
 
-    errors = validate(filepath)
+    errors, data = validate(filepath)
 
-    # Separate warnings from errors
-    warnings = [e for e in errors if e.startswith("WARNING")]
-    real_errors = [e for e in errors if not e.startswith("WARNING")]
+    # Separate warnings from errors (single pass)
+    warnings, real_errors = [], []
+    for e in errors:
+        if e.startswith("WARNING"):
+            warnings.append(e)
+        else:
+            real_errors.append(e)
 
     if real_errors:
         print("VALIDATION FAILED\n")
@@ -126,8 +132,6 @@ def main():
             for warning in warnings:
                 print(f"  ⚠️  {warning}")
         # Print summary
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
         parts = data.get('parts', [])
         total_qty = sum(p.get('quantity', 1) for p in parts)
         print(f"\nSummary: {len(parts)} unique parts, {total_qty} total components")
@@ -14,31 +14,36 @@ import sys
 import yaml
 from pathlib import Path
 
+from yaml_loader import YamlLoader
 
-def validate(filepath: Path, parts_filepath: Path) -> list:
-    """Validate step5 file and return list of errors."""
+# Substrings that mark a net as a power rail (also used by summarize_progress)
+POWER_NET_PATTERNS = ('GND', 'VCC', 'VDD', 'BAT', '+3V', '+5V', '+12V', '+1V')
+
+
+def validate(filepath: Path, parts_filepath: Path) -> tuple:
+    """Validate step5 file and return (errors, parsed data)."""
     errors = []
 
     # Check file exists
     if not filepath.exists():
-        return [f"File not found: {filepath}"]
+        return [f"File not found: {filepath}"], None
 
     # Parse YAML
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YamlLoader)
     except yaml.YAMLError as e:
-        return [f"YAML parse error: {e}"]
+        return [f"YAML parse error: {e}"], None
 
     if not data:
-        return ["File is empty"]
+        return ["File is empty"], data
 
     # Load parts from step4 for reference validation
     valid_component_ids = set()
     if parts_filepath.exists():
         try:
             with open(parts_filepath, 'r', encoding='utf-8') as f:
-                parts_data = yaml.safe_load(f)
+                parts_data = yaml.load(f, Loader=YamlLoader)
             if parts_data and 'parts' in parts_data:
                 for part in parts_data['parts']:
                     if isinstance(part, dict) and 'id' in part:
@@ -48,14 +53,14 @@ def validate(filepath: Path, parts_filepath: Path) -> list:
 
     # Check nets exists
     if 'nets' not in data:
-        return ["Missing 'nets' key"]
+        return ["Missing 'nets' key"], data
 
     nets = data['nets']
     if not isinstance(nets, dict):
-        return ["'nets' must be a dictionary"]
+        return ["'nets' must be a dictionary"], data
 
     if len(nets) == 0:
-        return ["No nets defined - cannot have empty netlist"]
+        return ["No nets defined - cannot have empty netlist"], data
 
     # Track all pin references for duplicate detection
     pin_to_nets = {}  # pin_ref -> list of net names
@@ -139,7 +144,7 @@ def validate(filepath: Path, parts_filepath: Path) -> list:
                 if comp and comp not in valid_component_ids:
                     errors.append(f"no_connect[{i}]: Unknown component '{comp}'")
 
-    return errors
+    return errors, data
 
 
 def main():
@@ -150,11 +155,15 @@ def main():
     print(f"Validating: {filepath}")
     print("=" * 60)
 
-    errors = validate(filepath, parts_filepath)
+    errors, data = validate(filepath, parts_filepath)
 
-    # Separate warnings from errors
-    warnings = [e for e in errors if e.startswith("WARNING")]
-    real_errors = [e for e in errors if not e.startswith("WARNING")]
+    # Separate warnings from errors (single pass)
+    warnings, real_errors = [], []
+    for e in errors:
+        if e.startswith("WARNING"):
+            warnings.append(e)
+        else:
+            real_errors.append(e)
 
     if real_errors:
         print("VALIDATION FAILED\n")
@@ -174,8 +183,6 @@ def main():
                 print(f"  {warning}")
 
         # Print summary
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
         nets = data.get('nets', {})
         total_connections = sum(len(conns) for conns in nets.values() if isinstance(conns, list))
         nc_count = len(data.get('no_connect', []))
@@ -186,7 +193,7 @@ def main():
         print(f"  - Test points: {tp_count}")
 
         # List power nets
-        power_nets = [n for n in nets.keys() if any(p in n.upper() for p in ['GND', 'VCC', 'VDD', 'BAT', '+3V', '+5V', '+12V', '+1V'])]
+        power_nets = [n for n in nets if any(p in n.upper() for p in POWER_NET_PATTERNS)]
         if power_nets:
             print(f"  - Power nets: {', '.join(power_nets)}")
 
@@ -21,6 +21,13 @@ import re
 from pathlib import Path
 from collections import defaultdict
 
+# Try to import orjson for faster JSON loading, fall back to json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 
 def export_netlist(schematic_path: Path, output_path: Path) -> bool:
     """Export netlist from schematic using kicad-cli."""
@@ -82,8 +89,11 @@ def load_expected_connections(pin_model_path: Path) -> dict:
 
     Returns dict: net_name -> [(ref, pin_name), ...]
     """
-    with open(pin_model_path) as f:
-        model = json.load(f)
+    if HAS_ORJSON:
+        model = orjson.loads(pin_model_path.read_bytes())
+    else:
+        with open(pin_model_path) as f:
+            model = json.load(f)
 
     nets = defaultdict(list)
 
@@ -115,37 +125,36 @@ def compare_netlists(expected: dict, actual: dict, symbol_lib_path: Path = None)
     # For now, do a simple comparison by net name
     # This won't catch pin name vs number mismatches
 
-    all_nets = set(expected.keys()) | set(actual.keys())
+    all_nets = expected.keys() | actual.keys()
 
     for net in sorted(all_nets):
-        exp_pins = set(expected.get(net, []))
-        act_pins = set(actual.get(net, []))
-
         # Find matches (note: expected has pin names, actual has pin numbers)
         # For a proper comparison, we'd need to map names to numbers
         # For now, report the raw comparison
 
-        if net in expected and net not in actual:
+        if net not in actual:
             results['missing'].append({
                 'net': net,
-                'expected_pins': list(exp_pins),
+                'expected_pins': expected[net],
                 'issue': 'Net not found in schematic'
             })
-        elif net not in expected and net in actual:
+        elif net not in expected:
             results['extra'].append({
                 'net': net,
-                'actual_pins': list(act_pins),
+                'actual_pins': actual[net],
                 'issue': 'Unexpected net in schematic'
             })
         else:
-            # Both exist - compare pin counts at least
+            # Both exist - compare pin counts at least (deduplicated)
+            exp_pins = sorted(set(expected[net]))
+            act_pins = sorted(set(actual[net]))
             if len(exp_pins) != len(act_pins):
                 results['net_mismatches'].append({
                     'net': net,
                     'expected_count': len(exp_pins),
                     'actual_count': len(act_pins),
-                    'expected_pins': list(exp_pins),
-                    'actual_pins': list(act_pins)
+                    'expected_pins': exp_pins,
+                    'actual_pins': act_pins
                 })
             else:
                 results['matched'].append(net)
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+PyYAML loader and dumper shared by the pipeline scripts.
+
+Prefers the libyaml-backed C implementations and falls back to pure
+Python when PyYAML was built without libyaml.
+"""
+
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+
+__all__ = ['YamlLoader', 'YamlDumper']
@@ -19,20 +19,65 @@ Notes:
 """
 from __future__ import annotations
 import os
+import sys
 import json
-import time
+import threading
 import urllib.parse
 import requests
 import yaml
-from typing import Any, Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# HTTP pooling, request pacing, the search cache and the YAML loader are
+# shared with the KiCAD generator's scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "KiCAD-Generator-tools", "scripts"))
+from jlc_http import DEFAULT_CACHE_MAX_AGE_HOURS, QueryCache, RateLimiter, size_http_pool
+from yaml_loader import YamlLoader
+
+# Try to import orjson for faster JSON writing
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 DEFAULT_TIMEOUT = 30
 
+# Minimum seconds between requests (be polite to the API)
+REQUEST_DELAY = 0.3
+
+# Parts looked up concurrently (the work is network-bound)
+DEFAULT_WORKERS = 4
+
+# One HTTP session shared by the workers so connections are reused
+http_session = requests.Session()
+size_http_pool(http_session, DEFAULT_WORKERS)
+
+rate_limiter = RateLimiter(REQUEST_DELAY)
+
+# Persistent search cache (stored next to the output file)
+CACHE_FILENAME = ".jlcsearch_cache.sqlite"
+
+# Active cache, set up by enrich_parts() (None = caching disabled)
+query_cache: Optional[QueryCache] = None
+
+# Searches issued during this run, keyed by (query, limit). Parts that share
+# an MPN (e.g. several 100nF capacitors) wait on the same request.
+_searches: Dict[Tuple[str, int], Future] = {}
+_searches_lock = threading.Lock()
+
 def load_yaml(path: str) -> dict:
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=YamlLoader)
 
 def save_json(path: str, obj: Any) -> None:
+    # Both writers emit raw UTF-8 and coerce non-string keys (YAML metadata
+    # may have int keys), so the file does not depend on orjson being installed
+    if HAS_ORJSON:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
     with open(path, "w", encoding="utf-8") as f:
         json.dump(obj, f, indent=2, ensure_ascii=False)
 
@@ -65,10 +110,47 @@ def jlcsearch_search(query: str, limit: int = 10) -> dict:
         "q": query,
         "limit": str(limit)
     })
-    r = requests.get(url, timeout=DEFAULT_TIMEOUT)
+    rate_limiter.wait()
+    r = http_session.get(url, timeout=DEFAULT_TIMEOUT)
     r.raise_for_status()
     return r.json()
 
+def search_parts(query: str, limit: int = 10) -> dict:
+    """
+    Search for a part, issuing each distinct query only once per run.
+
+    Concurrent callers with the same query wait for the request already
+    in flight and share its response.
+    """
+    key = (query, limit)
+    with _searches_lock:
+        future = _searches.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _searches[key] = future
+
+    if owner:
+        try:
+            future.set_result(cached_jlcsearch_search(query, limit))
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+
+    return future.result()
+
+def cached_jlcsearch_search(query: str, limit: int = 10) -> dict:
+    """jlcsearch_search() via the persistent cache when one is active."""
+    if query_cache is not None:
+        cached = query_cache.get(query, limit)
+        if cached is not None:
+            return cached
+
+    res = jlcsearch_search(query, limit)
+    if query_cache is not None:
+        query_cache.put(query, limit, res)
+    return res
+
 def pick_best_candidate(components: List[dict], prefer_basic: bool = True) -> Optional[dict]:
     """
     Pick the best component from results.
@@ -90,11 +172,14 @@ def pick_best_candidate(components: List[dict], prefer_basic: bool = True) -> Op
         s += min(stock, 999)  # Cap stock contribution
         return s
 
-    sorted_components = sorted(components, key=score, reverse=True)
-    return sorted_components[0]
+    # max() keeps the first of equally scored parts, as a stable sort would
+    return max(components, key=score)
 
 def format_lcsc(lcsc_num) -> str:
     """Format LCSC number with C prefix"""
+    # jlcsearch returns plain ints - take that path without further checks
+    if type(lcsc_num) is int:
+        return f"C{lcsc_num}"
     if lcsc_num is None:
         return None
     if isinstance(lcsc_num, str) and lcsc_num.startswith("C"):
@@ -109,18 +194,70 @@ def get_part_type(component: dict) -> str:
         return "preferred"
     return "extended"
 
-def enrich_parts(req_path: str, out_path: str) -> dict:
-    req = load_yaml(req_path)
-    out = {"meta": req.get("meta", {}), "parts": []}
+def lean_candidate(c: dict) -> dict:
+    """Short form of a search result, kept in the output unless verbose"""
+    return {"lcsc": format_lcsc(c.get("lcsc")), "mfr": c.get("mfr"), "stock": c.get("stock")}
+
+def known_selection(p: dict, note: str) -> dict:
+    """Selection built from the LCSC code pinned in the requirements file"""
+    return {
+        "lcsc": format_lcsc(p.get("lcsc")),
+        "mpn": p.get("mpn"),
+        "package": p.get("package"),
+        "description": p.get("function"),
+        "stock": None,
+        "price": None,
+        "part_type": p.get("part_type", "unknown"),
+        "is_basic": p.get("part_type") == "basic",
+        "is_preferred": False,
+        "note": note
+    }
 
-    total = len(req.get("parts", []))
+def enrich_parts(req_path: str, out_path: str, workers: int = DEFAULT_WORKERS,
+                 use_cache: bool = True,
+                 cache_max_age_hours: float = DEFAULT_CACHE_MAX_AGE_HOURS,
+                 force_refresh: bool = False, verbose: bool = False) -> dict:
+    """
+    Look up every part in the requirements file.
+
+    Parts are searched concurrently on a bounded thread pool; records are
+    collected in input order so the output file is stable. Search results
+    are cached on disk next to the output file unless use_cache is False.
+    Parts with an LCSC code pinned in the requirements are not searched
+    unless force_refresh is True. Candidates are reduced to lcsc/mfr/stock
+    unless verbose is True.
+    """
+    global query_cache
+    _searches.clear()
+    size_http_pool(http_session, workers)
+    if use_cache:
+        cache_path = os.path.join(os.path.dirname(os.path.abspath(out_path)), CACHE_FILENAME)
+        query_cache = QueryCache(cache_path, cache_max_age_hours)
+        print(f"Using search cache: {cache_path}")
+
+    try:
+        return _enrich_parts(req_path, workers, force_refresh, verbose)
+    finally:
+        if query_cache is not None:
+            query_cache.close()
+            query_cache = None
+
+def _enrich_parts(req_path: str, workers: int, force_refresh: bool, verbose: bool) -> dict:
+    """Body of enrich_parts(), run with the search cache set up."""
+    req = load_yaml(req_path)
+    parts = req.get("parts", [])
+    total = len(parts)
 
-    for idx, p in enumerate(req.get("parts", []), 1):
+    def enrich_one(idx: int, p: dict) -> dict:
         designator = p.get("designator") or p.get("key")
         query = p.get("mpn")
         known_lcsc = p.get("lcsc")
+        skip_search = bool(known_lcsc) and not force_refresh
 
-        print(f"[{idx}/{total}] Searching: {designator} - {query}")
+        if skip_search:
+            print(f"[{idx}/{total}] Known: {designator} - {format_lcsc(known_lcsc)}")
+        else:
+            print(f"[{idx}/{total}] Searching: {designator} - {query}")
 
         record = {
             "designator": designator,
@@ -138,6 +275,10 @@ def enrich_parts(req_path: str, out_path: str) -> dict:
             "error": None
         }
 
+        if skip_search:
+            record["selection"] = known_selection(p, "Using known LCSC from requirements")
+            return record
+
         # Try official API (if configured)
         try:
             api_res = jlc_components_api_search(query)
@@ -151,7 +292,7 @@ def enrich_parts(req_path: str, out_path: str) -> dict:
         # Fall back to jlcsearch
         if not record["candidates"]:
             try:
-                res = jlcsearch_search(query, limit=10)
+                res = search_parts(query, limit=10)
                 components = res.get("components", [])
                 record["candidates"] = components
 
@@ -172,18 +313,8 @@ def enrich_parts(req_path: str, out_path: str) -> dict:
                 else:
                     # If no results from search, use known LCSC from YAML
                     if known_lcsc:
-                        record["selection"] = {
-                            "lcsc": known_lcsc if known_lcsc.startswith("C") else f"C{known_lcsc}",
-                            "mpn": query,
-                            "package": p.get("package"),
-                            "description": p.get("function"),
-                            "stock": None,
-                            "price": None,
-                            "part_type": p.get("part_type", "unknown"),
-                            "is_basic": p.get("part_type") == "basic",
-                            "is_preferred": False,
-                            "note": "Using known LCSC from requirements (no API match)"
-                        }
+                        record["selection"] = known_selection(
+                            p, "Using known LCSC from requirements (no API match)")
                         print(f"    -> Using known: {known_lcsc}")
                     else:
                         print(f"    -> NO MATCH FOUND")
@@ -194,25 +325,20 @@ def enrich_parts(req_path: str, out_path: str) -> dict:
                 print(f"    -> Error: {error_msg}")
                 # Fall back to known LCSC
                 if known_lcsc:
-                    record["selection"] = {
-                        "lcsc": known_lcsc if known_lcsc.startswith("C") else f"C{known_lcsc}",
-                        "mpn": query,
-                        "package": p.get("package"),
-                        "description": p.get("function"),
-                        "stock": None,
-                        "price": None,
-                        "part_type": p.get("part_type", "unknown"),
-                        "is_basic": p.get("part_type") == "basic",
-                        "is_preferred": False,
-                        "note": "Using known LCSC from requirements (API error)"
-                    }
+                    record["selection"] = known_selection(
+                        p, "Using known LCSC from requirements (API error)")
                     print(f"    -> Fallback to known: {known_lcsc}")
             except Exception as e:
                 record["error"] = str(e)
                 print(f"    -> Error: {str(e)}")
 
-        out["parts"].append(record)
-        time.sleep(0.3)  # be polite to the API
+        if not verbose:
+            record["candidates"] = [lean_candidate(c) for c in record["candidates"]]
+        return record
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        records = list(pool.map(enrich_one, range(1, total + 1), parts))
+    out = {"meta": req.get("meta", {}), "parts": records}
 
     # Summary stats
     found = sum(1 for p in out["parts"] if p.get("selection"))
@@ -237,9 +363,21 @@ def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--in", dest="inp", default="parts_requirements.yaml")
     ap.add_argument("--out", dest="out", default="jlc_parts_enriched.json")
+    ap.add_argument("--workers", "-j", type=int, default=DEFAULT_WORKERS,
+                    help=f"Parts to look up concurrently (default: {DEFAULT_WORKERS})")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Ignore and do not update the on-disk search cache")
+    ap.add_argument("--max-age", type=float, default=DEFAULT_CACHE_MAX_AGE_HOURS,
+                    help=f"Refetch cached searches older than this many hours (default: {DEFAULT_CACHE_MAX_AGE_HOURS:g})")
+    ap.add_argument("--force-refresh", action="store_true",
+                    help="Search parts even when the requirements pin an LCSC code")
+    ap.add_argument("--verbose", action="store_true",
+                    help="Keep the full search results for every candidate")
     args = ap.parse_args()
 
-    enriched = enrich_parts(args.inp, args.out)
+    enriched = enrich_parts(args.inp, args.out, args.workers,
+                            use_cache=not args.no_cache, cache_max_age_hours=args.max_age,
+                            force_refresh=args.force_refresh, verbose=args.verbose)
     save_json(args.out, enriched)
     print(f"\nWrote {args.out}")
     return 0